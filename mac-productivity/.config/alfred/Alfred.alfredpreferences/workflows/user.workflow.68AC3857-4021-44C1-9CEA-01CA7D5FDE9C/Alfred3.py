@@ -4,7 +4,6 @@ import json
 import os
 import sys
 import time
-from plistlib import dump, load
 
 """
 Alfred Script Filter generator class
@@ -21,11 +20,26 @@ class Items(object):
 
         object: WF  object
     """
+    # Encoder of the compact output, no whitespace between tokens
+    COMPACT_ENCODER = json.JSONEncoder(separators=(",", ":"), default=str)
 
-    def __init__(self):
+    def __init__(self, compact: bool = False, max_results: int = None):
+        """
+        Args:
+
+            compact (bool, optional): Stream items without whitespace to stdout as soon as
+                addItem commits them, write() finishes the output. Defaults to False.
+            max_results (int, optional): Items committed after max_results items are
+                discarded. Defaults to None (no limit).
+        """
         self.item = {}
         self.items = []
         self.mods = {}
+        self.compact = compact
+        self.max_results = max_results
+        self.streamed = 0
+        # top level keys of the Script Filter output besides items
+        self.response = {}
 
     def getItemsLengths(self) -> int:
         """
@@ -38,6 +52,59 @@ class Items(object):
         """
         return len(self.items)
 
+    def isFull(self) -> bool:
+        """
+        Check if max_results items are committed, further items are discarded
+
+        Returns:
+
+            bool: True if no more items are taken
+        """
+        return self.max_results is not None and len(self.items) >= self.max_results
+
+    def setCache(self, seconds: int, loosereload: bool = False) -> None:
+        """
+        Let Alfred cache the output of the Script Filter
+
+        Args:
+
+            seconds (int): Time to cache the results, 5 to 86400 seconds
+            loosereload (bool, optional): Show cached results while the script reruns. Defaults to False.
+
+        Raises:
+
+            ValueError: if seconds is out of range
+        """
+        if not 5 <= seconds <= 86400:
+            raise ValueError("Cache seconds must be between 5 and 86400")
+        self.response.update({"cache": {"seconds": seconds, "loosereload": loosereload}})
+
+    def setRerun(self, seconds: float) -> None:
+        """
+        Let Alfred rerun the Script Filter after seconds
+
+        Args:
+
+            seconds (float): Rerun interval, 0.1 to 5.0 seconds
+
+        Raises:
+
+            ValueError: if seconds is out of range
+        """
+        if not 0.1 <= seconds <= 5.0:
+            raise ValueError("Rerun seconds must be between 0.1 and 5.0")
+        self.response.update({"rerun": seconds})
+
+    def setSkipKnowledge(self, skip: bool = True) -> None:
+        """
+        Keep the order of the items instead of sorting them with Alfred's knowledge
+
+        Args:
+
+            skip (bool, optional): Skip knowledge. Defaults to True.
+        """
+        self.response.update({"skipknowledge": skip})
+
     def setKv(self, key: str, value: str) -> None:
         """
         Set a key value pair to item
@@ -54,12 +121,28 @@ class Items(object):
         Add/commits an item to the Script Filter Object
 
         Note: addItem needs to be called after setItem, addMod, setIcon
+        Items exceeding max_results are discarded
         """
         self.addModsToItem()
-        self.items.append(self.item)
+        if not self.isFull():
+            self.items.append(self.item)
+            if self.compact:
+                self.__stream_item(self.item)
         self.item = {}
         self.mods = {}
 
+    def __stream_item(self, item: dict) -> None:
+        """
+        Private method to write a committed item to stdout
+
+        Args:
+
+            item (dict): Script Filter item
+        """
+        sys.stdout.write('{"items":[' if self.streamed == 0 else ",")
+        sys.stdout.write(self.COMPACT_ENCODER.encode(item))
+        self.streamed += 1
+
     def setItem(self, **kwargs: str) -> None:
         """
         Add multiple key values to define an item
@@ -112,8 +195,11 @@ class Items(object):
             raise ValueError(f"Type must be in: {valid_keys}")
         the_items = dict()
         the_items.update({"items": self.items})
+        the_items.update(self.response)
         if response_type == "dict":
             return the_items
+        elif response_type == "json" and self.compact:
+            return self.COMPACT_ENCODER.encode(the_items)
         elif response_type == "json":
             return json.dumps(the_items, default=str, indent=4)
 
@@ -203,7 +289,13 @@ class Items(object):
             id (int): list indes
             key (str): key which needs to be updated
             value (str): new value
+
+        Raises:
+
+            ValueError: if items are streamed, they are already written to stdout
         """
+        if self.compact:
+            raise ValueError("Streamed items cannot be updated")
         dict_item = self.items[id]
         kv = dict_item[key]
         dict_item[key] = kv + value
@@ -217,6 +309,14 @@ class Items(object):
 
             response_type (str, optional): json or dict as output format. Defaults to 'json'.
         """
+        if self.compact and response_type == "json":
+            # items are already written by addItem
+            sys.stdout.write("]" if self.streamed else '{"items":[]')
+            for key, value in self.response.items():
+                sys.stdout.write(f',"{key}":{self.COMPACT_ENCODER.encode(value)}')
+            sys.stdout.write("}")
+            sys.stdout.flush()
+            return
         output = self.getItems(response_type=response_type)
         sys.stdout.write(output)
 
@@ -456,6 +556,8 @@ class Plist:
     """
 
     def __init__(self):
+        # plistlib is imported on use, Script Filters reading only the environment don't need it
+        from plistlib import load
         # Read info.plist into a standard Python dictionary
         with open("info.plist", "rb") as fp:
             self.info = load(fp)
@@ -514,6 +616,7 @@ class Plist:
         """
         Save changes to Plist
         """
+        from plistlib import dump
         with open("info.plist", "wb") as fp:
             dump(self.info, fp)
 
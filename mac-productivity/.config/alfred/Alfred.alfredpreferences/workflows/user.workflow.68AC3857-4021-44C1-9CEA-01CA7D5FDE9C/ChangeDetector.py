@@ -0,0 +1,281 @@
+import json
+import os
+import time
+import zlib
+
+
+class ChangeDetector(object):
+    FILE_NAME = 'change_detector.json'
+    # Files of a workflow directory whose stamps are part of the plist fingerprint
+    PLIST_FILES = ['info.plist', 'prefs.plist']
+
+    def __init__(self, cache_dir):
+        """Cheap check if the workflows directory changed since the last full verification
+
+        Args:
+            cache_dir (str): Alfred workflow cache directory, state is kept in memory only when empty
+        """
+        self.path = os.path.join(cache_dir, self.FILE_NAME) if cache_dir else None
+        self.state = self._load()
+
+    def _load(self):
+        """Load state of the last verification
+
+        Returns:
+            dict: fingerprint, generation and time of the last verification
+        """
+        if not self.path:
+            return dict()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fp:
+                state = json.load(fp)
+        except (OSError, ValueError):
+            return dict()
+        return state if isinstance(state, dict) else dict()
+
+    @staticmethod
+    def fingerprint(wf_directory):
+        """Get fingerprint of the workflows directory with a single stat
+
+        Adding or removing a workflow changes the directory. In-place edits
+        of a workflow's plists do not, they are picked up by the watchers of
+        server.py and by the next verification.
+
+        Args:
+            wf_directory (str): Workflows directory
+
+        Returns:
+            list: mtime, inode, link count and size of the directory, None if it does not exist
+        """
+        try:
+            st = os.stat(wf_directory)
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_ino, st.st_nlink, st.st_size]
+
+    @classmethod
+    def plist_fingerprint(cls, wf_directory):
+        """Get fingerprint of the workflows directory and the plists of every workflow
+
+        Costs a stat call per plist, only used by the PollingWatcher of
+        long running processes to detect in-place edits.
+
+        Args:
+            wf_directory (str): Workflows directory
+
+        Returns:
+            list: Directory fingerprint and two checksums over mtime and size
+                of all plists, None if the directory does not exist
+        """
+        fingerprint = cls.fingerprint(wf_directory)
+        try:
+            with os.scandir(wf_directory) as it:
+                wf_dirs = sorted(e.path for e in it if e.is_dir())
+        except OSError:
+            return None
+        # mtime and size of each plist, None for missing files
+        stamps = list()
+        for wf_dir in wf_dirs:
+            for f in cls.PLIST_FILES:
+                try:
+                    f_st = os.stat(f"{wf_dir}/{f}")
+                    stamps += (f_st.st_mtime_ns, f_st.st_size)
+                except OSError:
+                    stamps += (None, None)
+        data = repr([wf_dirs, stamps]).encode('utf-8', 'surrogateescape')
+        return fingerprint + [zlib.crc32(data), zlib.adler32(data)] if fingerprint else None
+
+    def is_unchanged(self, wf_directory, generation):
+        """Check if the last verification is still valid
+
+        Args:
+            wf_directory (str): Workflows directory
+            generation (str): Generation of the workflow index
+
+        Returns:
+            bool: True if the index can be used without checking each workflow
+        """
+        fingerprint = self.fingerprint(wf_directory)
+        return (
+            fingerprint is not None and
+            self.state.get('fingerprint') == fingerprint and
+            self.state.get('generation') == generation and
+            self.state.get('directory') == wf_directory
+        )
+
+    def mark_verified(self, wf_directory, generation, fingerprint):
+        """Store the state after all workflow stamps were checked
+
+        Args:
+            wf_directory (str): Workflows directory
+            generation (str): Generation of the workflow index after the verification
+            fingerprint (list): Fingerprint taken before the verification started
+        """
+        self.state = {
+            'directory': wf_directory,
+            'fingerprint': fingerprint,
+            'generation': generation,
+            'verified': time.time()
+        }
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fp:
+                json.dump(self.state, fp)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+
+
+class PollingWatcher(object):
+
+    def __init__(self, wf_directory):
+        """Change watcher for long running processes without kqueue support
+
+        Args:
+            wf_directory (str): Workflows directory
+        """
+        self.wf_directory = wf_directory
+        self.fingerprint = ChangeDetector.plist_fingerprint(wf_directory)
+
+    def has_changed(self):
+        """Check for changes since the last call, including in-place plist edits
+
+        Returns:
+            bool: True if the workflows need to be verified
+        """
+        fingerprint = ChangeDetector.plist_fingerprint(self.wf_directory)
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            return True
+        return False
+
+    def close(self):
+        pass
+
+
+class KqueueWatcher(object):
+
+    def __init__(self, wf_directory):
+        """Change watcher based on kqueue vnode events (macOS/BSD)
+
+        Watches the workflows directory, every workflow directory and
+        their info.plist and prefs.plist files.
+
+        Args:
+            wf_directory (str): Workflows directory
+
+        Raises:
+            OSError: if not all files can be watched
+        """
+        import select
+        self.select = select
+        self.wf_directory = wf_directory
+        self.kqueue = select.kqueue()
+        self.fds = list()
+        self.is_broken = False
+        try:
+            self._watch_all()
+        except OSError:
+            self.close()
+            raise
+
+    def _get_watch_paths(self):
+        paths = [self.wf_directory]
+        for entry in os.scandir(self.wf_directory):
+            if entry.is_dir():
+                paths.append(entry.path)
+                for f in ('info.plist', 'prefs.plist'):
+                    f_path = os.path.join(entry.path, f)
+                    if os.path.isfile(f_path):
+                        paths.append(f_path)
+        return paths
+
+    def _raise_file_limit(self, count):
+        """Raise the open files limit for the watched file descriptors
+
+        Args:
+            count (int): Number of descriptors needed on top of the ones in use
+
+        Raises:
+            OSError: if the limit cannot be raised far enough
+        """
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        needed = count + 64
+        if soft != resource.RLIM_INFINITY and soft < needed:
+            if hard != resource.RLIM_INFINITY and hard < needed:
+                raise OSError('Too many files to watch')
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (needed, hard))
+            except ValueError as e:
+                # macOS rejects soft limits above OPEN_MAX with EINVAL
+                raise OSError(f"Too many files to watch: {e}")
+
+    def _watch_all(self):
+        select = self.select
+        paths = self._get_watch_paths()
+        self._raise_file_limit(len(paths))
+        flags = (
+            select.KQ_NOTE_WRITE | select.KQ_NOTE_DELETE | select.KQ_NOTE_RENAME |
+            select.KQ_NOTE_EXTEND | select.KQ_NOTE_ATTRIB
+        )
+        events = list()
+        for p in paths:
+            fd = os.open(p, os.O_RDONLY)
+            self.fds.append(fd)
+            events.append(select.kevent(
+                fd,
+                filter=select.KQ_FILTER_VNODE,
+                flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                fflags=flags
+            ))
+        self.kqueue.control(events, 0, 0)
+
+    def _close_fds(self):
+        for fd in self.fds:
+            os.close(fd)
+        self.fds = list()
+
+    def has_changed(self):
+        """Check for changes since the last call, without blocking
+
+        Returns:
+            bool: True if the workflows need to be verified
+        """
+        if self.is_broken:
+            return True
+        if not self.kqueue.control(None, 64, 0):
+            return False
+        # files may have been replaced, watch the current ones
+        self._close_fds()
+        self.kqueue.close()
+        self.kqueue = self.select.kqueue()
+        try:
+            self._watch_all()
+        except OSError:
+            # without complete watches every call has to report a change
+            self._close_fds()
+            self.is_broken = True
+        return True
+
+    def close(self):
+        self._close_fds()
+        self.kqueue.close()
+
+
+def get_watcher(wf_directory):
+    """Get the best change watcher available on this platform
+
+    Args:
+        wf_directory (str): Workflows directory
+
+    Returns:
+        object: KqueueWatcher or PollingWatcher, both provide has_changed() and close()
+    """
+    try:
+        return KqueueWatcher(wf_directory)
+    except (ImportError, AttributeError, OSError, ValueError):
+        return PollingWatcher(wf_directory)
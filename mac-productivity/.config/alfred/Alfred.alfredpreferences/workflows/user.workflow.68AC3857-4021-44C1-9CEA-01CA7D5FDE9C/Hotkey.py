@@ -0,0 +1,115 @@
+class Hotkey(object):
+    """Alfred hotkey modifiers, decoded from the hotmod bit mask of info.plist
+
+    A hotkey is identified by (mask, key): mask holds the modifier bits
+    below, key is the lower case hotstring.
+    """
+    SHIFT = u"\u21E7"
+    CONTROL = u"\u2303"
+    COMMAND = u"\u2318"
+    OPTION = u"\u2325"
+    FN = "fn"
+
+    # NSEvent modifier flags in display order, all other bits of hotmod are ignored
+    MODIFIERS = [
+        (1 << 17, SHIFT),
+        (1 << 18, CONTROL),
+        (1 << 19, OPTION),
+        (1 << 20, COMMAND)
+    ]
+    FN_MASK = 1 << 23
+    NAMES = {
+        'shift': SHIFT,
+        'ctrl': CONTROL,
+        'control': CONTROL,
+        'opt': OPTION,
+        'option': OPTION,
+        'alt': OPTION,
+        'cmd': COMMAND,
+        'command': COMMAND,
+        'fn': FN
+    }
+
+    @classmethod
+    def get_mask(cls, hotmod):
+        """Reduce hotmod to the modifiers shown to the user
+
+        fn is only kept without other modifiers, Alfred sets it for
+        function and arrow keys as well.
+
+        Args:
+            hotmod (int): hotmod of a hotkey trigger
+
+        Returns:
+            int: Modifier mask
+        """
+        mask = 0
+        for bit, _ in cls.MODIFIERS:
+            if hotmod & bit:
+                mask |= bit
+        if not mask and hotmod & cls.FN_MASK:
+            mask = cls.FN_MASK
+        return mask
+
+    @classmethod
+    def decode(cls, hotmod):
+        """Get modifier symbols of hotmod
+
+        Args:
+            hotmod (int): hotmod of a hotkey trigger
+
+        Returns:
+            str: e.g. ⇧⌘, empty when there are no modifiers
+        """
+        mask = cls.get_mask(hotmod) if isinstance(hotmod, int) else 0
+        if mask == cls.FN_MASK:
+            return cls.FN
+        return ''.join(symbol for bit, symbol in cls.MODIFIERS if mask & bit)
+
+    @classmethod
+    def _get_symbol_mask(cls, symbols):
+        mask = 0
+        for bit, symbol in cls.MODIFIERS:
+            if symbol in symbols:
+                mask |= bit
+        if cls.FN in symbols and not mask:
+            mask = cls.FN_MASK
+        return mask
+
+    @classmethod
+    def parse(cls, text):
+        """Parse a hotkey typed by the user
+
+        Args:
+            text (str): e.g. ⌘⌥, ⌘⌥K or cmd+opt+k
+
+        Returns:
+            tuple: (modifier mask, lower case key or empty str)
+        """
+        symbols = set()
+        key = str()
+        modifier_symbols = ''.join(symbol for _, symbol in cls.MODIFIERS)
+        for part in text.split('+'):
+            rest = part.lstrip(modifier_symbols)
+            symbols.update(part[:len(part) - len(rest)])
+            if rest.lower() in cls.NAMES:
+                symbols.add(cls.NAMES[rest.lower()])
+            elif rest:
+                key = rest.strip().lower()
+        return cls._get_symbol_mask(symbols), key
+
+    @classmethod
+    def parse_display(cls, keyb):
+        """Parse a hotkey as shown in a workflow item
+
+        Args:
+            keyb (str): Hotkey as built by Workflows.get_item e.g. '⌘⌥ K'
+
+        Returns:
+            tuple: (modifier mask, lower case key), None if keyb is not a hotkey
+        """
+        if not isinstance(keyb, str):
+            return None
+        symbols, _, key = keyb.partition(' ')
+        mask = cls.FN_MASK if symbols == cls.FN else cls._get_symbol_mask(symbols)
+        return mask, key.lower()
@@ -0,0 +1,112 @@
+import fcntl
+import os
+import struct
+import sys
+import time
+
+
+class LatencyStore(object):
+    FILE_NAME = 'latency.bin'
+    MAGIC = b'ALFL'
+    VERSION = 1
+    # Number of runs kept, the oldest run is overwritten first
+    SLOTS = 4096
+    # magic, version, total number of recorded runs
+    HEADER = struct.Struct('<4sHxxQ')
+    # time, wall time in ms, script, cache state, number of results
+    RECORD = struct.Struct('<dfBBH')
+    SCRIPTS = ['alf.py', 'keywords.py', 'action.py']
+    # none: the script does not use the workflow index
+    STATES = ['cold', 'warm', 'stale', 'none']
+
+    def __init__(self, data_dir):
+        """Fixed size ring buffer of Script Filter run times
+
+        Args:
+            data_dir (str): Alfred workflow data directory
+        """
+        self.path = os.path.join(data_dir, self.FILE_NAME)
+        self.size = self.HEADER.size + self.SLOTS * self.RECORD.size
+
+    def _open(self, lock):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, lock)
+        except OSError:
+            os.close(fd)
+            raise
+        return fd
+
+    def _read_count(self, fd):
+        """Read number of recorded runs from the header
+
+        Args:
+            fd (int): Locked file descriptor
+
+        Returns:
+            int: Number of recorded runs, None if the file is not a valid store
+        """
+        if os.fstat(fd).st_size != self.size:
+            return None
+        magic, version, count = self.HEADER.unpack(os.pread(fd, self.HEADER.size, 0))
+        if magic != self.MAGIC or version != self.VERSION:
+            return None
+        return count
+
+    def record(self, script, ms, state, results):
+        """Store a run, concurrent runs are serialized by an exclusive lock
+
+        Args:
+            script (str): Entry point, one of SCRIPTS
+            ms (float): Wall time in ms
+            state (str): Cache state, one of STATES
+            results (int): Number of Alfred items
+        """
+        if script not in self.SCRIPTS or state not in self.STATES:
+            return
+        try:
+            fd = self._open(fcntl.LOCK_EX)
+        except OSError as e:
+            sys.stderr.write(f"Latency store: {e}\n")
+            return
+        try:
+            count = self._read_count(fd)
+            if count is None:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, self.size)
+                count = 0
+            record = self.RECORD.pack(
+                time.time(), ms, self.SCRIPTS.index(script), self.STATES.index(state), min(results, 0xFFFF))
+            os.pwrite(fd, record, self.HEADER.size + (count % self.SLOTS) * self.RECORD.size)
+            os.pwrite(fd, self.HEADER.pack(self.MAGIC, self.VERSION, count + 1), 0)
+        except OSError as e:
+            sys.stderr.write(f"Latency store: {e}\n")
+        finally:
+            os.close(fd)
+
+    def read(self):
+        """Read all stored runs
+
+        Returns:
+            list: (time, ms, script, state, results) tuples, oldest first
+        """
+        if not os.path.isfile(self.path):
+            return list()
+        fd = self._open(fcntl.LOCK_SH)
+        try:
+            count = self._read_count(fd)
+            if not count:
+                return list()
+            data = os.pread(fd, self.SLOTS * self.RECORD.size, self.HEADER.size)
+        finally:
+            os.close(fd)
+        filled = min(count, self.SLOTS)
+        # oldest record is the one which gets overwritten next
+        start = count % self.SLOTS if count > self.SLOTS else 0
+        runs = list()
+        for n in range(filled):
+            t, ms, script, state, results = self.RECORD.unpack_from(
+                data, ((start + n) % self.SLOTS) * self.RECORD.size)
+            if script < len(self.SCRIPTS) and state < len(self.STATES):
+                runs.append((t, ms, self.SCRIPTS[script], self.STATES[state], results))
+        return runs
@@ -0,0 +1,157 @@
+from xml.parsers.expat import ExpatError, ParserCreate
+
+
+class PlistExtractor(object):
+    """Streaming reader for XML plists which only builds the values selected by a schema
+
+    A schema describes the wanted part of the document:
+        True: keep the value with everything below it
+        dict: keep a dict with the keys of the schema dict, '*' matches every key
+        list: keep an array, its only element is the schema of the array items
+    Everything else is skipped without creating objects. Binary plists
+    are loaded completely with plistlib.
+    """
+    # Bytes passed to expat per call, large scripts arrive as few text chunks
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, schema):
+        """
+        Args:
+            schema (dict): Schema of the plist root
+        """
+        self.schema = schema
+
+    def load(self, fp):
+        """Read the selected values of a plist
+
+        Args:
+            fp (file): plist opened in binary mode
+
+        Raises:
+            ValueError: if the plist is invalid
+
+        Returns:
+            dict: Selected values of the plist
+        """
+        if fp.read(8) == b'bplist00':
+            from plistlib import load
+            fp.seek(0)
+            return load(fp)
+        fp.seek(0)
+        self.stack = list()
+        self.skip_depth = 0
+        self.text = list()
+        self.result = None
+        parser = ParserCreate()
+        parser.buffer_text = True
+        parser.buffer_size = self.BUFFER_SIZE
+        parser.StartElementHandler = self._start_element
+        parser.EndElementHandler = self._end_element
+        parser.CharacterDataHandler = self._character_data
+        parser.EntityDeclHandler = self._entity_decl
+        try:
+            parser.ParseFile(fp)
+        except ExpatError as e:
+            raise ValueError(f"Invalid plist: {e}")
+        if not isinstance(self.result, dict):
+            raise ValueError('plist root is not a dict')
+        return self.result
+
+    def _entity_decl(self, *args):
+        # same as plistlib, entity declarations are not allowed
+        raise ValueError('XML entity declarations are not supported in plist files')
+
+    def _get_value_schema(self):
+        """Get schema of the value which starts now
+
+        Returns:
+            object: Schema or None if the value is not needed
+        """
+        if not self.stack:
+            return self.schema
+        container, schema, key = self.stack[-1]
+        if schema is True:
+            return True
+        if isinstance(container, list):
+            return schema[0]
+        return schema.get(key, schema.get('*'))
+
+    def _store(self, value):
+        if not self.stack:
+            self.result = value
+            return
+        frame = self.stack[-1]
+        if isinstance(frame[0], list):
+            frame[0].append(value)
+        else:
+            frame[0][frame[2]] = value
+            frame[2] = None
+
+    def _start_element(self, name, attrs):
+        if self.skip_depth:
+            self.skip_depth += 1
+            return
+        if name == 'plist':
+            return
+        self.text = list()
+        if name == 'key':
+            return
+        schema = self._get_value_schema()
+        if schema is None:
+            self.skip_depth = 1
+        elif name == 'dict':
+            self.stack.append([dict(), schema, None])
+        elif name == 'array':
+            self.stack.append([list(), schema, None])
+
+    def _end_element(self, name):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            if not self.skip_depth and self.stack:
+                self.stack[-1][2] = None
+            return
+        if name == 'plist':
+            return
+        if name == 'key':
+            self.stack[-1][2] = ''.join(self.text)
+        elif name in ('dict', 'array'):
+            self._store(self.stack.pop()[0])
+        else:
+            self._store(self._get_leaf(name, ''.join(self.text)))
+
+    def _character_data(self, data):
+        if not self.skip_depth:
+            self.text.append(data)
+
+    @staticmethod
+    def _get_leaf(name, text):
+        """Convert text of a leaf element
+
+        Args:
+            name (str): Element name
+            text (str): Text content
+
+        Raises:
+            ValueError: if the element is unknown
+
+        Returns:
+            object: Value
+        """
+        if name == 'string':
+            return text
+        if name == 'integer':
+            text = text.strip()
+            return int(text, 16) if text.lower().startswith('0x') else int(text)
+        if name == 'real':
+            return float(text)
+        if name == 'true':
+            return True
+        if name == 'false':
+            return False
+        if name == 'data':
+            import binascii
+            return binascii.a2b_base64(text.encode('ascii'))
+        if name == 'date':
+            import datetime
+            return datetime.datetime.strptime(text.strip(), '%Y-%m-%dT%H:%M:%SZ')
+        raise ValueError(f"Unknown plist element {name}")
@@ -0,0 +1,203 @@
+import os
+import sys
+import time
+
+
+class Span(object):
+
+    def __init__(self, profiler, name):
+        """Timed phase of a run, durations of spans with the same name add up
+
+        Args:
+            profiler (Profiler): Profiler collecting the span
+            name (str): Name of the phase
+        """
+        self.profiler = profiler
+        self.name = name
+        self.started = 0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class NullSpan(object):
+    """Span used while profiling is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Profiler(object):
+    # alf_profile=1 (or stderr) writes a timing record to stderr,
+    # alf_profile=file appends it to FILE_NAME in the workflow data directory
+    ENV_NAME = 'alf_profile'
+    # alf_cprofile=1 runs the entry point in cProfile, stats are saved
+    # as <script>.prof in the workflow data directory
+    CPROFILE_ENV_NAME = 'alf_cprofile'
+    # the wall time of every run is recorded for alfstats unless
+    # latency_log=0, runs profiled with alf_profile are always recorded
+    LATENCY_ENV_NAME = 'latency_log'
+    FILE_NAME = 'profile.jsonl'
+    NULL_SPAN = NullSpan()
+
+    def __init__(self):
+        """Per phase timing of a Script Filter run, disabled unless alf_profile is set
+
+        The wall time of a run, from the start of its process, is recorded
+        in the LatencyStore unless latency_log is turned off.
+        """
+        self.mode = None
+        self.log_latency = False
+        self.script = None
+        self.spans = dict()
+        self.info = dict()
+        self.started = 0
+
+    @staticmethod
+    def get_process_start():
+        """Get the time the current process started
+
+        Interpreter startup and imports are CPU bound, the CPU time used
+        so far is taken as the time since the start. The result is never
+        before the actual start, run times are rather under- than overstated.
+
+        Returns:
+            float: Start time in seconds since the epoch, like time.time()
+        """
+        return time.time() - time.process_time()
+
+    def begin(self, script, started=None):
+        """Start a run, reads the configuration from the environment
+
+        Args:
+            script (str): Name of the entry point e.g. alf.py
+            started (float, optional): time.time() the run started, e.g. the start of the
+                client process of a server request. Defaults to the start of this process.
+        """
+        mode = os.getenv(self.ENV_NAME, '').lower()
+        self.mode = 'file' if mode == 'file' else 'stderr' if mode in ('1', 'stderr') else None
+        self.log_latency = bool(self.mode) or os.getenv(self.LATENCY_ENV_NAME, '1').lower() not in ('0', 'false')
+        self.script = script
+        self.spans = dict()
+        self.info = dict()
+        if started is None:
+            started = self.get_process_start()
+        # span timing uses perf_counter, map the start onto that clock
+        self.started = time.perf_counter() - max(0.0, time.time() - started)
+
+    def span(self, name):
+        """Time a phase, use as context manager
+
+        Args:
+            name (str): Name of the phase
+
+        Returns:
+            object: Span or NULL_SPAN when profiling is disabled
+        """
+        return Span(self, name) if self.mode else self.NULL_SPAN
+
+    def add(self, name, seconds):
+        """Add duration to a phase
+
+        Args:
+            name (str): Name of the phase
+            seconds (float): Duration
+        """
+        span = self.spans.setdefault(name, [0.0, 0])
+        span[0] += seconds
+        span[1] += 1
+
+    def annotate(self, **info):
+        """Add fields to the timing record of the run
+
+        Args:
+            **info: Fields e.g. query or number of results
+        """
+        self.info.update(info)
+
+    def end(self):
+        """Finish the run, record its wall time and write the timing record
+        """
+        total_ms = (time.perf_counter() - self.started) * 1000
+        if self.log_latency:
+            self._record_latency(total_ms)
+        if not self.mode:
+            return
+        import json
+        record = {
+            'script': self.script,
+            'time': time.time(),
+            'total_ms': round(total_ms, 3),
+            'spans': {n: {'ms': round(s * 1000, 3), 'count': c} for n, (s, c) in self.spans.items()}
+        }
+        record.update(self.info)
+        line = json.dumps(record, separators=(',', ':'))
+        if self.mode == 'file':
+            try:
+                with open(os.path.join(self._get_data_dir(), self.FILE_NAME), 'a', encoding='utf-8') as fp:
+                    fp.write(line + '\n')
+                return
+            except OSError as e:
+                sys.stderr.write(f"Profile: {e}\n")
+        sys.stderr.write(line + '\n')
+
+    def _record_latency(self, total_ms):
+        """Store wall time of the run
+
+        Args:
+            total_ms (float): Wall time in ms
+        """
+        # imported on use, only needed at the end of the run
+        from LatencyStore import LatencyStore
+        try:
+            data_dir = self._get_data_dir()
+        except OSError:
+            return
+        # runs which do not use the workflow index (action.py) have no cache state
+        state = self.info.get('cache', 'none')
+        LatencyStore(data_dir).record(self.script, total_ms, state, self.info.get('results', 0))
+
+    def run(self, script, func, *args, started=None):
+        """Run an entry point as profiled run
+
+        Args:
+            script (str): Name of the entry point
+            func (callable): main function of the entry point
+            *args: Arguments of func
+            started (float, optional): time.time() the run started, see begin. Defaults to None.
+        """
+        self.begin(script, started)
+        try:
+            if os.getenv(self.CPROFILE_ENV_NAME) == '1':
+                self._run_cprofile(script, func, *args)
+            else:
+                func(*args)
+        finally:
+            self.end()
+
+    def _run_cprofile(self, script, func, *args):
+        import cProfile
+        stats_path = os.path.join(self._get_data_dir(), f"{os.path.splitext(script)[0]}.prof")
+        p = cProfile.Profile()
+        try:
+            p.runcall(func, *args)
+        finally:
+            p.dump_stats(stats_path)
+
+    @staticmethod
+    def _get_data_dir():
+        data_dir = os.getenv('alfred_workflow_data', '')
+        os.makedirs(data_dir, exist_ok=True)
+        return data_dir
+
+
+# Profiler of the current run, shared by all modules
+profiler = Profiler()
@@ -0,0 +1,67 @@
+from string import Template
+
+
+class QuicklookRenderer(object):
+    """Markdown templates of the Quicklook hint files
+    """
+    DOCUMENT = Template(
+        "# ${name}\n"
+        "\n"
+        "### Description\n"
+        "* ${description}\n"
+        "\n"
+        "### Keywords\n"
+        "${keywords}"
+        "${shortcuts}"
+    )
+    SHORTCUTS = Template("\n\n### Shortcuts\n${shortcuts}")
+    KEYWORD = Template("* **${keyword}** - ${title}\n")
+    SHORTCUT = Template("* ${shortcut}\n\n")
+    NO_KEYWORDS = "* n/a"
+
+    @classmethod
+    def render_keywords(cls, keywords: list) -> str:
+        """Render keyword list
+
+        Args:
+            keywords (list): [keyword, title] pairs
+
+        Returns:
+            str: Markdown list
+        """
+        if not keywords:
+            return cls.NO_KEYWORDS
+        return ''.join(cls.KEYWORD.substitute(keyword=k, title=t) for k, t in keywords)
+
+    @classmethod
+    def render_shortcuts(cls, shortcuts: list) -> str:
+        """Render keyboard shortcut list
+
+        Args:
+            shortcuts (list): Formatted keyboard shortcuts
+
+        Returns:
+            str: Markdown list
+        """
+        return ''.join(cls.SHORTCUT.substitute(shortcut=s) for s in shortcuts)
+
+    @classmethod
+    def render(cls, name: str, description: str, keywords_md: str, shortcuts_md: str) -> bytes:
+        """Render hint file
+
+        Args:
+            name (str): Workflow name
+            description (str): Workflow description
+            keywords_md (str): Rendered keyword list
+            shortcuts_md (str): Rendered keyboard shortcut list, section is omitted when empty
+
+        Returns:
+            bytes: UTF-8 encoded markdown document
+        """
+        shortcuts = cls.SHORTCUTS.substitute(shortcuts=shortcuts_md) if shortcuts_md else str()
+        return cls.DOCUMENT.substitute(
+            name=name,
+            description=description,
+            keywords=keywords_md,
+            shortcuts=shortcuts
+        ).encode('utf-8')
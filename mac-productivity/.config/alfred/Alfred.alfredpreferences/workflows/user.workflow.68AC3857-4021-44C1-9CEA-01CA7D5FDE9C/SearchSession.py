@@ -0,0 +1,71 @@
+import json
+import os
+
+
+class SearchSession(object):
+    FILE_NAME = 'search_session.json'
+
+    def __init__(self, cache_dir):
+        """Matches of the previous search, used to narrow down the next keystroke
+
+        Args:
+            cache_dir (str): Alfred workflow cache directory, session is disabled when empty
+        """
+        self.path = os.path.join(cache_dir, self.FILE_NAME) if cache_dir else None
+
+    def get_candidates(self, search_term, generation):
+        """Get matches of the previous search if search_term extends it
+
+        Every workflow matching search_term also matched any prefix of it,
+        so the previous matches are a complete candidate set.
+
+        Args:
+            search_term (str): Current search term
+            generation (str): Generation of the workflow catalogue
+
+        Returns:
+            set: Catalogue ids of candidates or None when the session cannot be used
+        """
+        if not self.path:
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fp:
+                session = json.load(fp)
+            previous_term = session['search_term']
+            wf_ids = session['ids']
+            session_generation = session['generation']
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+        if (
+            session_generation != generation or
+            not isinstance(previous_term, str) or
+            not previous_term or
+            not search_term.lower().startswith(previous_term) or
+            not isinstance(wf_ids, list)
+        ):
+            return None
+        return set(wf_ids)
+
+    def save(self, search_term, generation, wf_ids):
+        """Store matches of a search
+
+        Args:
+            search_term (str): Search term
+            generation (str): Generation of the workflow catalogue
+            wf_ids (list): Catalogue ids of all workflows matching search_term
+        """
+        if not self.path:
+            return
+        session = {
+            'search_term': search_term.lower(),
+            'generation': generation,
+            'ids': wf_ids
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fp:
+                json.dump(session, fp)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
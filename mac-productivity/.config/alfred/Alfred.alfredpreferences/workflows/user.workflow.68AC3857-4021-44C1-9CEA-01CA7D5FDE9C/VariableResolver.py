@@ -0,0 +1,77 @@
+import os
+
+
+class VariableResolver(object):
+    # prefs.plist values by path with the (mtime, size) they were read at,
+    # a long running server parses a prefs.plist again only when it changed
+    PREFS_CACHE = dict()
+
+    def __init__(self, plist_path, user_config):
+        """Resolves var: keywords of a workflow, prefs.plist and defaults are loaded once
+
+        Args:
+            plist_path (str): Path to info.plist
+            user_config (list): userconfigurationconfig of the workflow
+        """
+        self.prefs_path = os.path.join(os.path.dirname(plist_path), 'prefs.plist')
+        self.user_config = user_config
+        self.prefs = None
+        self.defaults = None
+
+    def _get_prefs(self):
+        """Get values of prefs.plist
+
+        Raises:
+            ValueError: if prefs.plist is invalid
+
+        Returns:
+            dict: Values set by the user, empty if the workflow has no prefs.plist
+        """
+        if self.prefs is not None:
+            return self.prefs
+        try:
+            st = os.stat(self.prefs_path)
+        except OSError:
+            self.prefs = dict()
+            return self.prefs
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self.PREFS_CACHE.get(self.prefs_path)
+        if cached and cached[0] == stamp:
+            self.prefs = cached[1]
+            return self.prefs
+        # imported on use, only needed when the index is outdated
+        from PlistExtractor import PlistExtractor
+        try:
+            with open(self.prefs_path, 'rb') as fp:
+                self.prefs = PlistExtractor({'*': True}).load(fp)
+        except Exception as e:
+            raise ValueError(f"Invalid prefs.plist: {e}")
+        self.PREFS_CACHE[self.prefs_path] = (stamp, self.prefs)
+        return self.prefs
+
+    def _get_defaults(self):
+        """Get defaults of userconfigurationconfig
+
+        Returns:
+            dict: Default values by lower case variable name
+        """
+        if self.defaults is None:
+            self.defaults = {
+                i.get('variable').lower(): i.get('config').get('default', "")
+                for i in self.user_config or ()
+            }
+        return self.defaults
+
+    def resolve(self, variable):
+        """Get value of a workflow variable
+
+        Args:
+            variable (str): Variable name
+
+        Returns:
+            str: Value from prefs.plist, the default value if it is not set there
+        """
+        value = self._get_prefs().get(variable)
+        if not value:
+            value = self._get_defaults().get(variable.lower(), str())
+        return value
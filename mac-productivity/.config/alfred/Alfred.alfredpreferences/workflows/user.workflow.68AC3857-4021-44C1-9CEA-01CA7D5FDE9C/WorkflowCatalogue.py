@@ -0,0 +1,415 @@
+import os
+import struct
+import sys
+import zlib
+
+from Hotkey import Hotkey
+
+
+class WorkflowCatalogue(object):
+    """Read-only binary catalogue of the workflow records
+
+    Layout, all integers little endian:
+        header
+        workflow records    sorted by collation key of the name, the position is the workflow id
+        keyword records     referenced by first/count of a workflow record
+        hotkey records      referenced by first/count of a workflow record
+        token records       sorted by token, (token, workflow id)
+        path records        workflow ids sorted by info.plist path
+        hotkey slots        open addressing hash table (mask, key) -> workflow id
+        string table        UTF-8 strings referenced by (offset, length)
+
+    All records have a fixed width, opening the catalogue only reads the
+    header and records are decoded when they are accessed.
+    """
+    FILE_NAME = 'workflows.catalogue'
+    MAGIC = b'ALFC'
+    # Bump when the layout changes
+    VERSION = 5
+    # magic, version, exclude_disabled, generation, number of workflows,
+    # keywords, hotkeys, tokens and hotkey slots
+    HEADER = struct.Struct('<4sHH32sIIIII')
+    # path, name, description, icon, first keyword, keyword count, first hotkey, hotkey count, flags
+    WORKFLOW = struct.Struct('<13I')
+    # type, keyword, title, text, withspace
+    KEYWORD = struct.Struct('<9I')
+    # keyb, note
+    HOTKEY = struct.Struct('<4I')
+    # token, workflow id
+    TOKEN = struct.Struct('<3I')
+    PATH = struct.Struct('<I')
+    # key, modifier mask, workflow id + 1, 0 marks an empty slot
+    HOTKEY_SLOT = struct.Struct('<4I')
+    # offset of a string which is None
+    NONE = 0xFFFFFFFF
+    # flags of a workflow record
+    DISABLED = 1
+    # withspace values
+    FLAGS = {False: 0, True: 1, None: 2}
+    FLAG_VALUES = [False, True, None]
+
+    def __init__(self, buffer):
+        """
+        Args:
+            buffer (object): Catalogue content, bytes or mmap
+
+        Raises:
+            ValueError: if buffer is not a valid catalogue
+        """
+        if len(buffer) < self.HEADER.size:
+            raise ValueError('Catalogue too short')
+        (
+            magic, version, exclude_disabled, generation,
+            self.count, self.keyword_count, self.hotkey_count, self.token_count, self.slot_count
+        ) = self.HEADER.unpack_from(buffer, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError('Unknown catalogue format')
+        self.buffer = buffer
+        self.exclude_disabled = bool(exclude_disabled)
+        self.generation = generation.decode('ascii')
+        self.workflow_offset = self.HEADER.size
+        self.keyword_offset = self.workflow_offset + self.count * self.WORKFLOW.size
+        self.hotkey_offset = self.keyword_offset + self.keyword_count * self.KEYWORD.size
+        self.token_offset = self.hotkey_offset + self.hotkey_count * self.HOTKEY.size
+        self.path_offset = self.token_offset + self.token_count * self.TOKEN.size
+        self.slot_offset = self.path_offset + self.count * self.PATH.size
+        self.string_offset = self.slot_offset + self.slot_count * self.HOTKEY_SLOT.size
+        if len(buffer) < self.string_offset:
+            raise ValueError('Catalogue truncated')
+
+    @classmethod
+    def open(cls, path):
+        """Map a catalogue file into memory
+
+        Args:
+            path (str): Path of the catalogue file
+
+        Returns:
+            WorkflowCatalogue: Catalogue or None if the file is missing or invalid
+        """
+        import mmap
+        try:
+            with open(path, 'rb') as fp:
+                buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            return cls(buffer)
+        except ValueError:
+            buffer.close()
+            return None
+
+    def close(self):
+        if hasattr(self.buffer, 'close'):
+            self.buffer.close()
+
+    def __len__(self):
+        return self.count
+
+    def _get_string(self, offset, length):
+        if offset == self.NONE:
+            return None
+        start = self.string_offset + offset
+        return self.buffer[start:start + length].decode('utf-8', 'surrogateescape')
+
+    def get_path(self, wf_id):
+        """Get info.plist path of a workflow
+
+        Args:
+            wf_id (int): Workflow id
+
+        Returns:
+            str: Path to info.plist
+        """
+        record = self.WORKFLOW.unpack_from(self.buffer, self.workflow_offset + wf_id * self.WORKFLOW.size)
+        return self._get_string(*record[0:2])
+
+    def get_item(self, wf_id):
+        """Decode a workflow record
+
+        Args:
+            wf_id (int): Workflow id
+
+        Returns:
+            dict: Workflow item as built by Workflows.get_item
+        """
+        r = self.WORKFLOW.unpack_from(self.buffer, self.workflow_offset + wf_id * self.WORKFLOW.size)
+        keywords = list()
+        for n in range(r[8], r[8] + r[9]):
+            k = self.KEYWORD.unpack_from(self.buffer, self.keyword_offset + n * self.KEYWORD.size)
+            keywords.append({
+                'type': self._get_string(k[0], k[1]),
+                'keyword': self._get_string(k[2], k[3]),
+                'title': self._get_string(k[4], k[5]),
+                'text': self._get_string(k[6], k[7]),
+                'withspace': self.FLAG_VALUES[k[8]]
+            })
+        keyb = list()
+        for n in range(r[10], r[10] + r[11]):
+            h = self.HOTKEY.unpack_from(self.buffer, self.hotkey_offset + n * self.HOTKEY.size)
+            keyb.append({
+                'keyb': self._get_string(h[0], h[1]),
+                'note': self._get_string(h[2], h[3])
+            })
+        return {
+            'name': self._get_string(r[2], r[3]),
+            'path': self._get_string(r[0], r[1]),
+            'description': self._get_string(r[4], r[5]),
+            'keywords': keywords,
+            'keyb': keyb,
+            'icon': self._get_string(r[6], r[7]),
+            'disabled': bool(r[12] & self.DISABLED)
+        }
+
+    def get_items(self, wf_ids=None):
+        """Decode workflow records
+
+        Args:
+            wf_ids (iterable, optional): Workflow ids, all workflows in name order if None. Defaults to None.
+
+        Returns:
+            list: Workflow items
+        """
+        return [self.get_item(i) for i in (range(self.count) if wf_ids is None else wf_ids)]
+
+    def view(self, reverse=False):
+        """Get all workflows in name order without decoding them
+
+        Args:
+            reverse (bool, optional): Reverse name order. Defaults to False.
+
+        Returns:
+            CatalogueView: Sequence of workflow items
+        """
+        wf_ids = range(self.count)
+        return CatalogueView(self, wf_ids[::-1] if reverse else wf_ids)
+
+    def _get_token(self, n):
+        t = self.TOKEN.unpack_from(self.buffer, self.token_offset + n * self.TOKEN.size)
+        return self._get_string(t[0], t[1]), t[2]
+
+    def find(self, prefix):
+        """Find workflows with a token starting with prefix
+
+        Args:
+            prefix (str): Lower case token prefix
+
+        Returns:
+            set: Workflow ids
+        """
+        lo, hi = 0, self.token_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._get_token(mid)[0] < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        matches = set()
+        while lo < self.token_count:
+            token, wf_id = self._get_token(lo)
+            if not token.startswith(prefix):
+                break
+            matches.add(wf_id)
+            lo += 1
+        return matches
+
+    def find_path(self, plist_path):
+        """Find workflow by info.plist path
+
+        Args:
+            plist_path (str): Path to info.plist
+
+        Returns:
+            int: Workflow id or None if the workflow is not in the catalogue
+        """
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            wf_id = self.PATH.unpack_from(self.buffer, self.path_offset + mid * self.PATH.size)[0]
+            path = self.get_path(wf_id)
+            if path == plist_path:
+                return wf_id
+            if path < plist_path:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    @staticmethod
+    def _get_slot(mask, key, slot_count):
+        """Get first slot of a hotkey in the hash table
+
+        Args:
+            mask (int): Modifier mask
+            key (str): Lower case key
+            slot_count (int): Size of the hash table, a power of two
+
+        Returns:
+            int: Slot index
+        """
+        return zlib.crc32(f"{mask}:{key}".encode('utf-8', 'surrogateescape')) & (slot_count - 1)
+
+    def find_hotkey(self, mask, key):
+        """Find workflows owning a hotkey, constant time regardless of the number of workflows
+
+        Args:
+            mask (int): Modifier mask as returned by Hotkey.parse
+            key (str): Lower case key
+
+        Returns:
+            set: Workflow ids
+        """
+        matches = set()
+        if not self.slot_count:
+            return matches
+        n = self._get_slot(mask, key, self.slot_count)
+        while True:
+            key_offset, key_length, slot_mask, wf_ref = self.HOTKEY_SLOT.unpack_from(
+                self.buffer, self.slot_offset + n * self.HOTKEY_SLOT.size)
+            if not wf_ref:
+                return matches
+            if slot_mask == mask and self._get_string(key_offset, key_length) == key:
+                matches.add(wf_ref - 1)
+            n = (n + 1) & (self.slot_count - 1)
+
+    @staticmethod
+    def get_sort_key(name):
+        """Collation key of a workflow name, case and accents are ignored
+
+        Args:
+            name (str): Workflow name
+
+        Returns:
+            str: Casefolded name without combining marks
+        """
+        import unicodedata
+        decomposed = unicodedata.normalize('NFKD', str(name))
+        return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+    @classmethod
+    def build(cls, workflows, tokens, generation, exclude_disabled):
+        """Encode a catalogue
+
+        Args:
+            workflows (list): Workflow items
+            tokens (dict): Tokens by info.plist path
+            generation (str): Generation of the workflow index the items are taken from
+            exclude_disabled (bool): exclude_disabled setting the items were built with
+
+        Returns:
+            bytes: Catalogue content
+        """
+        strings = dict()
+        string_table = list()
+        string_size = [0]
+
+        def ref(value):
+            if value is None:
+                return cls.NONE, 0
+            data = (value if isinstance(value, str) else str(value)).encode('utf-8', 'surrogateescape')
+            offset = strings.get(data)
+            if offset is None:
+                offset = strings[data] = string_size[0]
+                string_table.append(data)
+                string_size[0] += len(data)
+            return offset, len(data)
+
+        workflows = sorted(
+            workflows, key=lambda k: (cls.get_sort_key(k.get('name')), str(k.get('name')), k.get('path')))
+        workflow_records = list()
+        keyword_records = list()
+        hotkey_records = list()
+        token_pairs = list()
+        for wf_id, wf in enumerate(workflows):
+            keywords = wf.get('keywords', [])
+            keyb = wf.get('keyb', [])
+            workflow_records.append(cls.WORKFLOW.pack(
+                *ref(wf.get('path')), *ref(wf.get('name')), *ref(wf.get('description')), *ref(wf.get('icon')),
+                len(keyword_records), len(keywords), len(hotkey_records), len(keyb),
+                cls.DISABLED if wf.get('disabled') else 0
+            ))
+            for k in keywords:
+                keyword_records.append(cls.KEYWORD.pack(
+                    *ref(k.get('type')), *ref(k.get('keyword')), *ref(k.get('title')), *ref(k.get('text')),
+                    cls.FLAGS.get(k.get('withspace'), 1)
+                ))
+            for h in keyb:
+                hotkey_records.append(cls.HOTKEY.pack(*ref(h.get('keyb')), *ref(h.get('note'))))
+            token_pairs += [(t, wf_id) for t in tokens.get(wf.get('path'), [])]
+        token_pairs.sort()
+        token_records = [cls.TOKEN.pack(*ref(t), wf_id) for t, wf_id in token_pairs]
+        path_order = sorted(range(len(workflows)), key=lambda i: workflows[i].get('path'))
+        hotkeys = set()
+        for wf_id, wf in enumerate(workflows):
+            for h in wf.get('keyb', []):
+                hotkey = Hotkey.parse_display(h.get('keyb'))
+                if hotkey is not None:
+                    hotkeys.add(hotkey + (wf_id,))
+        # at most half of the slots are used, probe sequences stay short
+        slot_count = 1 << (2 * len(hotkeys) - 1).bit_length() if hotkeys else 0
+        slots = [None] * slot_count
+        for mask, key, wf_id in sorted(hotkeys):
+            n = cls._get_slot(mask, key, slot_count)
+            while slots[n] is not None:
+                n = (n + 1) & (slot_count - 1)
+            slots[n] = cls.HOTKEY_SLOT.pack(*ref(key), mask, wf_id + 1)
+        empty_slot = cls.HOTKEY_SLOT.pack(cls.NONE, 0, 0, 0)
+        slots = [s if s is not None else empty_slot for s in slots]
+        header = cls.HEADER.pack(
+            cls.MAGIC, cls.VERSION, 1 if exclude_disabled else 0, generation.encode('ascii'),
+            len(workflow_records), len(keyword_records), len(hotkey_records), len(token_records), slot_count
+        )
+        return b''.join(
+            [header] + workflow_records + keyword_records + hotkey_records + token_records +
+            [cls.PATH.pack(i) for i in path_order] + slots + string_table
+        )
+
+    @staticmethod
+    def write(path, data):
+        """Replace catalogue file atomically, readers keep their mapping of the old file
+
+        Args:
+            path (str): Path of the catalogue file
+            data (bytes): Catalogue content
+
+        Returns:
+            bool: True if the file was written
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as fp:
+                fp.write(data)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            sys.stderr.write(f"Error: {e} ({path})\n")
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+
+class CatalogueView(object):
+
+    def __init__(self, catalogue, wf_ids):
+        """Read-only sequence of catalogue workflows, items are decoded on access
+
+        Args:
+            catalogue (WorkflowCatalogue): Catalogue the items are read from
+            wf_ids (range): Workflow ids in the order of the view
+        """
+        self.catalogue = catalogue
+        self.wf_ids = wf_ids
+
+    def __len__(self):
+        return len(self.wf_ids)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return CatalogueView(self.catalogue, self.wf_ids[key])
+        return self.catalogue.get_item(self.wf_ids[key])
+
+    def __iter__(self):
+        return (self.catalogue.get_item(i) for i in self.wf_ids)
+
+    def __reversed__(self):
+        return iter(self[::-1])
@@ -0,0 +1,223 @@
+import json
+import os
+import re
+import sys
+
+
+class WorkflowIndex(object):
+    # Bump when the layout of the index file or of the
+    # stored workflow records changes
+    VERSION = 7
+    FILE_NAME = 'workflows_index.json'
+    # Files of a workflow directory which are part of its stamp
+    WORKFLOW_FILES = frozenset(['info.plist', 'prefs.plist', 'icon.png'])
+
+    # Tokens are the text following a word boundary, truncated to
+    # MAX_TOKEN_LENGTH characters. Longer search terms are looked up
+    # in the WorkflowCatalogue by their prefix and need to be verified by the caller.
+    MAX_TOKEN_LENGTH = 24
+    WORD_BOUNDARY = re.compile(r'\b')
+
+    def __init__(self, cache_dir, exclude_disabled):
+        """Persistent index of parsed workflow records, keyed by plist stamps
+
+        Args:
+            cache_dir (str): Alfred workflow cache directory, index is kept in memory only when empty
+            exclude_disabled (bool): exclude_disabled setting the records were built with
+        """
+        self.path = os.path.join(cache_dir, self.FILE_NAME) if cache_dir else None
+        self.exclude_disabled = exclude_disabled
+        self.changed = False
+        self.generation = None
+        self.entries = self._load()
+
+    def _load(self):
+        """Load index entries from disk
+
+        Returns:
+            dict: Entries by info.plist path, empty when index is missing, corrupt or outdated
+        """
+        if not self.path:
+            return dict()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return dict()
+        if (
+            not isinstance(data, dict) or
+            data.get('version') != self.VERSION or
+            data.get('exclude_disabled') != self.exclude_disabled or
+            not isinstance(data.get('entries'), dict)
+        ):
+            self.changed = True
+            return dict()
+        if isinstance(data.get('generation'), str):
+            self.generation = data.get('generation')
+        return data.get('entries')
+
+    @classmethod
+    def scan(cls, wf_directory):
+        """Get change stamps of all workflows in a single os.scandir pass
+
+        Directory entries tell which of WORKFLOW_FILES exist, only
+        info.plist and prefs.plist need a stat call.
+
+        Args:
+            wf_directory (str): Alfred workflows directory
+
+        Returns:
+            dict: Stamps by info.plist path, a stamp is mtime and size of info.plist
+                and prefs.plist (None when missing) and whether icon.png exists
+        """
+        with os.scandir(wf_directory) as it:
+            wf_dirs = [e.path for e in it if e.is_dir()]
+        stamps = dict()
+        for wf_dir in wf_dirs:
+            found = dict()
+            try:
+                with os.scandir(wf_dir) as it:
+                    for e in it:
+                        if e.name in cls.WORKFLOW_FILES and e.is_file():
+                            found[e.name] = e
+                info_stat = found['info.plist'].stat() if 'info.plist' in found else None
+                prefs_stat = found['prefs.plist'].stat() if 'prefs.plist' in found else None
+            except OSError:
+                continue
+            if info_stat is None:
+                continue
+            stamps[os.path.join(wf_dir, 'info.plist')] = [
+                info_stat.st_mtime_ns, info_stat.st_size,
+                prefs_stat.st_mtime_ns if prefs_stat else None,
+                prefs_stat.st_size if prefs_stat else None,
+                'icon.png' in found
+            ]
+        return stamps
+
+    @staticmethod
+    def _is_valid(entry):
+        """Check the shape of an index entry, malformed entries are treated as stale
+
+        Args:
+            entry: Entry as loaded from the index file
+
+        Returns:
+            bool: True if the entry can be used
+        """
+        return (
+            isinstance(entry, dict) and
+            isinstance(entry.get('stamp'), list) and
+            (entry.get('item') is None or isinstance(entry.get('item'), dict)) and
+            isinstance(entry.get('tokens', []), list) and
+            all(isinstance(t, str) for t in entry.get('tokens', []))
+        )
+
+    def get(self, plist_path, stamp):
+        """Get indexed workflow record
+
+        Args:
+            plist_path (str): Path to info.plist
+            stamp (list): Current stamp of the workflow
+
+        Returns:
+            tuple: (True, record) when the entry is fresh otherwise (False, None)
+        """
+        entry = self.entries.get(plist_path)
+        if stamp is not None and self._is_valid(entry) and entry.get('stamp') == stamp:
+            return True, entry.get('item')
+        return False, None
+
+    def put(self, plist_path, stamp, item, strings=()):
+        """Store a workflow record
+
+        Args:
+            plist_path (str): Path to info.plist
+            stamp (list): Stamp of the workflow the record was built from
+            item (dict): Workflow record or None when the workflow is skipped
+            strings (iterable, optional): Searchable strings of the record. Defaults to ().
+        """
+        self.entries[plist_path] = {
+            'stamp': stamp,
+            'item': item,
+            'tokens': self.get_tokens(strings)
+        }
+        self.changed = True
+        self.generation = None
+
+    @classmethod
+    def get_tokens(cls, strings):
+        """Get word-start tokens of strings
+
+        Args:
+            strings (iterable): Strings to tokenize
+
+        Returns:
+            list: Sorted, lower case tokens
+        """
+        tokens = set()
+        for s in strings:
+            for m in cls.WORD_BOUNDARY.finditer(s):
+                token = s[m.start():m.start() + cls.MAX_TOKEN_LENGTH].lower()
+                if token:
+                    tokens.add(token)
+        return sorted(tokens)
+
+    def get_tokens_by_path(self):
+        """Get tokens of all workflows which are not skipped
+
+        Returns:
+            dict: Tokens by info.plist path
+        """
+        return {
+            p: e.get('tokens', [])
+            for p, e in self.entries.items() if isinstance(e, dict) and e.get('item')
+        }
+
+    def prune(self, plist_paths):
+        """Remove entries of workflows which are no longer installed
+
+        Args:
+            plist_paths (list): Paths of all installed info.plist files
+        """
+        current = set(plist_paths)
+        for p in [p for p in self.entries if p not in current]:
+            del self.entries[p]
+            self.changed = True
+            self.generation = None
+
+    def get_generation(self):
+        """Get generation of the index, it changes whenever a workflow changes
+
+        Returns:
+            str: Hash over all workflow stamps
+        """
+        if self.generation is None:
+            # only needed after workflows changed, the stored generation is used otherwise
+            from hashlib import md5
+            stamps = sorted((p, e.get('stamp')) for p, e in self.entries.items() if isinstance(e, dict))
+            data = json.dumps([self.VERSION, self.exclude_disabled, stamps])
+            self.generation = md5(data.encode('utf-8')).hexdigest()
+        return self.generation
+
+    def save(self):
+        """Write index to disk when entries changed
+        """
+        if not (self.path and self.changed):
+            return
+        data = {
+            'version': self.VERSION,
+            'exclude_disabled': self.exclude_disabled,
+            'entries': self.entries,
+            'generation': self.get_generation()
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as fp:
+                json.dump(data, fp, default=str)
+            os.replace(tmp_path, self.path)
+            self.changed = False
+        except OSError as e:
+            sys.stderr.write(f"Error: {e} ({self.path})\n")
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
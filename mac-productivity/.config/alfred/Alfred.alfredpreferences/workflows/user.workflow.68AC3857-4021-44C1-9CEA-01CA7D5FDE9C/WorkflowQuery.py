@@ -0,0 +1,126 @@
+import re
+
+from Hotkey import Hotkey
+
+
+class WorkflowQuery(object):
+    """Search query with field filters
+
+    Syntax, all terms must match:
+        word            word prefix in any searchable text
+        (word           terms starting with punctuation match anywhere in the text
+        "two words"     phrase at a word start in any searchable text
+        name:word       word prefix in the name
+        desc:word       word prefix in the description
+        kw:word         keyword starting with word
+        hk:⌘⌥           hotkey with at least these modifiers
+        hk:⌘⌥K          exactly this hotkey, also hk:cmd+opt+k
+        disabled:true   disabled (or enabled with false) workflows
+        -term           negation of any of the above
+    Values of fields can be quoted as well, e.g. name:"disk usage".
+    """
+    # optional negation, optional field and a quoted phrase or a word
+    TERM = re.compile(r'\s*(-)?(?:(kw|hk|name|desc|disabled):)?(?:"([^"]*)"?|(\S+))', re.IGNORECASE)
+    WORD_START = re.compile(r'\w')
+
+    def __init__(self, query):
+        """Parse a query
+
+        Args:
+            query (str): Query as typed in Alfred
+        """
+        self.query = query
+        # (field or None, value, negated)
+        self.terms = list()
+        # plain queries are ranked by WorkflowRanker as typed
+        self.is_plain = True
+        for m in self.TERM.finditer(query):
+            negate, field, phrase, word = m.groups()
+            value = phrase if phrase is not None else word
+            if value is None:
+                continue
+            if negate or field or phrase is not None:
+                self.is_plain = False
+            self.terms.append((field.lower() if field else None, value, bool(negate)))
+
+    def get_prefixes(self):
+        """Get prefixes every match has a token of in the token index
+
+        Tokens start at word boundaries, terms starting with punctuation
+        like '(' match anywhere and cannot narrow the candidates.
+
+        Returns:
+            list: Lower case prefixes of all free text terms which are not negated
+        """
+        return [
+            value.lower() for field, value, negate in self.terms
+            if field is None and not negate and self.WORD_START.match(value)
+        ]
+
+    def get_hotkeys(self):
+        """Get exact hotkeys every match owns
+
+        Returns:
+            list: (modifier mask, key) of all hk terms with a key which are not negated
+        """
+        hotkeys = [Hotkey.parse(value) for field, value, negate in self.terms if field == 'hk' and not negate]
+        return [h for h in hotkeys if h[1]]
+
+    def _compile_term(self, field, value, get_strings):
+        """Build the predicate of a single term
+
+        Args:
+            field (str): Field name or None for free text
+            value (str): Value of the term
+            get_strings (callable): Returns the searchable strings of a workflow item
+
+        Returns:
+            callable: Predicate taking a workflow item
+        """
+        if field == 'disabled':
+            disabled = value.lower() in ('true', 'yes', '1')
+            return lambda wf: bool(wf.get('disabled')) == disabled
+        if field == 'kw':
+            prefix = value.lower()
+            return lambda wf: any(
+                isinstance(k.get('keyword'), str) and k.get('keyword').lower().startswith(prefix)
+                for k in wf.get('keywords', [])
+            )
+        if field == 'hk':
+            mask, key = Hotkey.parse(value)
+
+            def match_hotkey(wf):
+                for k in wf.get('keyb', []):
+                    hotkey = Hotkey.parse_display(k.get('keyb'))
+                    if hotkey is None:
+                        continue
+                    if key and hotkey == (mask, key):
+                        return True
+                    if not key and hotkey[0] & mask == mask:
+                        return True
+                return False
+            return match_hotkey
+        # escaped, the query is text and never a regular expression.
+        # Words match at a word start, punctuation like '(' or '+' anywhere
+        boundary = r'\b' if self.WORD_START.match(value) else ''
+        rx = re.compile(boundary + re.escape(value), re.IGNORECASE)
+        if field == 'name':
+            return lambda wf: isinstance(wf.get('name'), str) and rx.search(wf.get('name')) is not None
+        if field == 'desc':
+            return lambda wf: isinstance(wf.get('description'), str) and rx.search(wf.get('description')) is not None
+        return lambda wf: any(isinstance(s, str) and rx.search(s) for s in get_strings(wf))
+
+    def compile(self, get_strings):
+        """Compile the query into a predicate, regular expressions are built once
+
+        Args:
+            get_strings (callable): Returns the searchable strings of a workflow item
+
+        Returns:
+            callable: Predicate taking a workflow item, True if all terms match
+        """
+        predicates = [
+            (self._compile_term(field, value, get_strings), negate)
+            for field, value, negate in self.terms
+        ]
+        return lambda wf: all(p(wf) != negate for p, negate in predicates)
@@ -0,0 +1,124 @@
+import heapq
+
+
+class WorkflowRanker(object):
+    # Field weights, the best matching field defines the score
+    EXACT_KEYWORD = 100
+    KEYWORD_PREFIX = 80
+    NAME_PREFIX = 60
+    TEXT_PREFIX = 40
+    # Fuzzy matches score between FUZZY and FUZZY + FUZZY_SPAN_BONUS,
+    # the tighter the matched characters the higher
+    FUZZY = 10
+    FUZZY_SPAN_BONUS = 9
+
+    def __init__(self, search_term):
+        """Relevance scoring of workflow items for a search term
+
+        Args:
+            search_term (str): Search term
+        """
+        self.term = search_term.lower()
+
+    @staticmethod
+    def _is_word_char(c):
+        return c.isalnum() or c == '_'
+
+    def _word_prefix(self, text):
+        """Check if the search term starts at a word boundary of text
+
+        Args:
+            text (str): Text to search in
+
+        Returns:
+            bool: True if text contains a word starting with the search term
+        """
+        if not (text and self.term):
+            return False
+        text = text.lower()
+        pos = text.find(self.term)
+        while pos >= 0:
+            before = self._is_word_char(text[pos - 1]) if pos > 0 else False
+            if before != self._is_word_char(text[pos]):
+                return True
+            pos = text.find(self.term, pos + 1)
+        return False
+
+    def _fuzzy(self, text):
+        """Score search term as subsequence of text
+
+        Args:
+            text (str): Text to search in
+
+        Returns:
+            int: Fuzzy score or 0 when the term is not a subsequence of text
+        """
+        if not (text and self.term):
+            return 0
+        text = text.lower()
+        start = pos = text.find(self.term[0])
+        if start < 0:
+            return 0
+        for c in self.term[1:]:
+            pos = text.find(c, pos + 1)
+            if pos < 0:
+                return 0
+        span = pos - start + 1
+        return self.FUZZY + self.FUZZY_SPAN_BONUS * len(self.term) // span
+
+    def score(self, wf):
+        """Score a workflow item
+
+        Args:
+            wf (dict): Workflow item
+
+        Returns:
+            int: Score of the best matching field, 0 if nothing matches
+        """
+        keywords = [k.get('keyword') for k in wf.get('keywords', []) if isinstance(k.get('keyword'), str)]
+        keyword_names = [k.lower() for k in keywords]
+        if self.term in keyword_names:
+            return self.EXACT_KEYWORD
+        if any(k.startswith(self.term) for k in keyword_names):
+            return self.KEYWORD_PREFIX
+        name = wf.get('name') if isinstance(wf.get('name'), str) else str()
+        if self._word_prefix(name):
+            return self.NAME_PREFIX
+        texts = [wf.get('description')]
+        for k in wf.get('keywords', []):
+            texts += [k.get('title'), k.get('text')]
+        for k in wf.get('keyb', []):
+            texts += [k.get('keyb'), k.get('note')]
+        if any(self._word_prefix(t) for t in texts if isinstance(t, str)):
+            return self.TEXT_PREFIX
+        return max([self._fuzzy(name)] + [self._fuzzy(k) for k in keywords])
+
+    def match(self, workflows):
+        """Score workflows and drop the ones not matching
+
+        Args:
+            workflows (iterable): Workflow items in name order
+
+        Returns:
+            list: (score, position, workflow item) tuples of matching workflows
+        """
+        scored = ((self.score(wf), n, wf) for n, wf in enumerate(workflows))
+        return [(score, n, wf) for score, n, wf in scored if score > 0]
+
+    def top(self, matches, limit):
+        """Select the best scored workflows
+
+        Args:
+            matches (list): (score, position, workflow item) tuples as returned by match,
+                position is the rank of the workflow in name order
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Up to limit workflow items, best match first, equal scores in name order
+        """
+        best = heapq.nsmallest(
+            limit,
+            matches,
+            key=lambda k: (-k[0], k[1])
+        )
+        return [wf for _, _, wf in best]
@@ -1,9 +1,16 @@
 import os
-import re
 import sys
-from plistlib import load
 
 from Alfred3 import Tools
+from ChangeDetector import ChangeDetector
+from Hotkey import Hotkey
+from Profiler import profiler
+from SearchSession import SearchSession
+from VariableResolver import VariableResolver
+from WorkflowCatalogue import WorkflowCatalogue
+from WorkflowIndex import WorkflowIndex
+from WorkflowQuery import WorkflowQuery
+from WorkflowRanker import WorkflowRanker
 
 
 class Workflows(object):
@@ -16,66 +23,278 @@ class Workflows(object):
         'alfred.workflow.input.filefilter'
     ]
 
-    # HOTMOD constants for Keycombo
-    SHIFT = u"\u21E7"
-    CONTROL = u"\u2303"
-    COMMAND = u"\u2318"
-    OPTION = u"\u2325"
-    FN = "fn"
-
-    HOTMOD = {131072: SHIFT,
-              262144: CONTROL,
-              262401: CONTROL,
-              393216: SHIFT+CONTROL,
-              524288: OPTION,
-              655360: SHIFT+OPTION,
-              786432: CONTROL+OPTION,
-              917504: SHIFT+CONTROL+OPTION,
-              1048576: COMMAND,
-              1179648: SHIFT+COMMAND,
-              1310720: CONTROL+COMMAND,
-              1310985: CONTROL+COMMAND,
-              1441792: SHIFT+CONTROL+COMMAND,
-              1572864: OPTION+COMMAND,
-              1703936: SHIFT+OPTION+COMMAND,
-              1835008: CONTROL+OPTION+COMMAND,
-              1966080: SHIFT+CONTROL+OPTION+COMMAND,
-              8388608: FN,
-              8519680: SHIFT,
-              11272192: CONTROL+OPTION
-              }
+    # Part of info.plist read by get_item, readme, scripts and
+    # everything else is skipped while parsing
+    PLIST_SCHEMA = {
+        'name': True,
+        'description': True,
+        'disabled': True,
+        'uidata': {'*': {'note': True}},
+        'objects': [{
+            'type': True,
+            'uid': True,
+            'config': {
+                'hotmod': True,
+                'hotstring': True,
+                'keyword': True,
+                'title': True,
+                'text': True,
+                'withspace': True
+            }
+        }],
+        'userconfigurationconfig': [{
+            'variable': True,
+            'config': {'default': True}
+        }]
+    }
+
+    # Backends for parsing info.plist files which are not
+    # (or no longer) in the workflow index
+    INGEST_BACKENDS = ['serial', 'thread', 'process']
+    # Held while the catalogue is rebuilt
+    LOCK_FILE_NAME = 'workflows.lock'
 
     def __init__(self):
         """Workflow data represenative
+
+        Construction only reads the configuration, workflows are loaded on first use
+        """
+        self.config = None
+        self.index = None
+        self.catalogue = None
+        # True when the last catalogue was served while another process rebuilds it
+        self.is_stale = False
+        self._configure()
+
+    def _configure(self):
+        """Read configuration from the environment
+
+        The workflow index and catalogue are kept as long as the workflows
+        directory, the cache directory and the exclude_disabled setting do not change
         """
         self.wf_directory = Tools.getEnv('alfred_preferences') + "/workflows"
         exclude_disabled = Tools.getEnv('exclude_disabled').lower()
         self.exclude_disabled = True if exclude_disabled == "1" else False
-        self.workflows = self._get_workflows_list()
+        ingest_backend = Tools.getEnv('ingest_backend').lower()
+        self.ingest_backend = ingest_backend if ingest_backend in self.INGEST_BACKENDS else 'serial'
+        cache_dir = Tools.getEnv('alfred_workflow_cache')
+        if self.config != (self.wf_directory, cache_dir, self.exclude_disabled):
+            self.config = (self.wf_directory, cache_dir, self.exclude_disabled)
+            self.cache_dir = cache_dir
+            self.index = None
+            self._set_catalogue(None)
+            self.session = SearchSession(cache_dir)
+            self.detector = ChangeDetector(cache_dir)
+
+    def refresh(self, changed=None):
+        """Re-read configuration and update workflows which changed on disk
+
+        Used by long running processes which keep a Workflows object
+
+        Args:
+            changed (bool, optional): Result of a change watcher, None to rely on
+                the change detector. Defaults to None.
+        """
+        catalogue = self.catalogue
+        self._configure()
+        if changed is False and catalogue is not None and self.catalogue is catalogue:
+            profiler.annotate(cache='warm')
+            return
+        self._load_catalogue(verify=bool(changed))
+
+    @property
+    def workflows(self):
+        """CatalogueView: All workflow items in name order"""
+        return self.get_workflows()
 
     def get_workflows(self, reverse=False):
         """Get workflows sorted
 
+        The catalogue is sorted by name when it is built, no sorting or
+        copying happens here. Items are decoded when they are accessed,
+        slicing the view decodes nothing.
+
         Args:
             reverse (bool, optional): Reverse True. Defaults to False.
 
         Returns:
-            list: All workflows and content (dict) as list items
+            CatalogueView: All workflows and content (dict) as sequence items
+        """
+        return self._get_catalogue().view(reverse)
+
+    def __getstate__(self):
+        """Pickle only the configuration, process pool workers need nothing else to run get_item
+
+        Returns:
+            dict: Instance configuration
+        """
+        state = self.__dict__.copy()
+        state.pop('index', None)
+        state.pop('catalogue', None)
+        state.pop('session', None)
+        state.pop('detector', None)
+        return state
+
+    def _get_index(self):
+        """Get workflow index, loaded on first use
+
+        Returns:
+            WorkflowIndex: Index of the parsed workflows
+        """
+        if self.index is None:
+            with profiler.span('index_load'):
+                self.index = WorkflowIndex(self.cache_dir, self.exclude_disabled)
+        return self.index
+
+    def _set_catalogue(self, catalogue):
+        if self.catalogue is not None and self.catalogue is not catalogue:
+            self.catalogue.close()
+        self.catalogue = catalogue
+
+    def _get_catalogue(self):
+        """Get workflow catalogue, loaded on first use
+
+        Returns:
+            WorkflowCatalogue: Catalogue of all workflows
         """
-        return sorted(self.workflows, key=lambda k: k['name'], reverse=reverse)
+        if self.catalogue is None:
+            self._load_catalogue()
+        return self.catalogue
+
+    def _get_catalogue_path(self):
+        return os.path.join(self.cache_dir, WorkflowCatalogue.FILE_NAME) if self.cache_dir else None
+
+    def _is_current(self, catalogue):
+        """Check if the change detector rules out changes since catalogue was built
+
+        Args:
+            catalogue (WorkflowCatalogue): Catalogue or None
+
+        Returns:
+            bool: True if catalogue can be used as is
+        """
+        return (
+            catalogue is not None and
+            catalogue.exclude_disabled == self.exclude_disabled and
+            self.detector.is_unchanged(self.wf_directory, catalogue.generation)
+        )
+
+    def _load_catalogue(self, verify=False):
+        """Open the workflow catalogue, rebuild it when workflows changed
+
+        The catalogue is used as is while the change detector rules out
+        changes, otherwise all workflows are verified against the workflow index.
+        Only one process rebuilds at a time, the others serve the last
+        catalogue and set is_stale, or wait when there is none.
+
+        Args:
+            verify (bool, optional): Check all stamps regardless of the change detector. Defaults to False.
+        """
+        self.is_stale = False
+        catalogue_path = self._get_catalogue_path()
+        with profiler.span('detect'):
+            catalogue = self.catalogue
+            if catalogue is None and catalogue_path:
+                catalogue = WorkflowCatalogue.open(catalogue_path)
+            is_unchanged = not verify and self._is_current(catalogue)
+        if is_unchanged:
+            profiler.annotate(cache='warm')
+            self._set_catalogue(catalogue)
+            return
+        has_snapshot = catalogue is not None and catalogue.exclude_disabled == self.exclude_disabled
+        with profiler.span('lock'):
+            lock_fd = self._lock_rebuild(blocking=not has_snapshot)
+        if lock_fd is False:
+            # another process rebuilds, serve the last snapshot meanwhile
+            profiler.annotate(cache='stale')
+            self.is_stale = True
+            self._set_catalogue(catalogue)
+            return
+        try:
+            if lock_fd is not None and not verify:
+                # the previous lock holder may have rebuilt the catalogue already
+                self.detector = ChangeDetector(self.cache_dir)
+                rebuilt = WorkflowCatalogue.open(catalogue_path)
+                if self._is_current(rebuilt):
+                    profiler.annotate(cache='warm')
+                    if catalogue is not None and catalogue is not self.catalogue:
+                        catalogue.close()
+                    self._set_catalogue(rebuilt)
+                    return
+                if rebuilt is not None:
+                    rebuilt.close()
+            self._set_catalogue(self._rebuild_catalogue(catalogue, catalogue_path))
+        finally:
+            if lock_fd is not None:
+                os.close(lock_fd)
+
+    def _lock_rebuild(self, blocking):
+        """Acquire the lock which serializes catalogue rebuilds across processes
+
+        Args:
+            blocking (bool): Wait until the lock is free
+
+        Returns:
+            int: File descriptor holding the lock, None if there is no cache
+                directory to coordinate through, False if the lock is taken
+        """
+        if not self.cache_dir:
+            return None
+        import fcntl
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd = os.open(os.path.join(self.cache_dir, self.LOCK_FILE_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            sys.stderr.write(f"Error: {e} ({self.cache_dir})\n")
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        return fd
+
+    def _rebuild_catalogue(self, catalogue, catalogue_path):
+        """Verify all workflows and write a new catalogue if they changed
+
+        The new catalogue replaces the file atomically, processes which
+        mapped the old file keep reading it.
 
-    def _get_plist_info(self, plist_path):
-        """Read plist from given path
+        Args:
+            catalogue (WorkflowCatalogue): Last catalogue or None
+            catalogue_path (str): Path of the catalogue file, None to keep it in memory only
+
+        Returns:
+            WorkflowCatalogue: Up to date catalogue
+        """
+        workflows = self._get_workflows_list()
+        generation = self.index.get_generation()
+        if catalogue is None or catalogue.generation != generation or catalogue.exclude_disabled != self.exclude_disabled:
+            with profiler.span('catalogue_save'):
+                data = WorkflowCatalogue.build(
+                    workflows, self.index.get_tokens_by_path(), generation, self.exclude_disabled)
+                if catalogue_path:
+                    WorkflowCatalogue.write(catalogue_path, data)
+                if catalogue is not None and catalogue is not self.catalogue:
+                    catalogue.close()
+                catalogue = WorkflowCatalogue(data)
+        return catalogue
+
+    def _get_plist_info(self, plist_path, schema):
+        """Read the part of a plist described by schema
 
         Args:
             plist_path (str): Path to file.plist
+            schema (dict): Schema of the needed values, see PlistExtractor
 
         Returns:
             dict: Plist in dict format
         """
+        # imported on use, only needed when the index is outdated
+        from PlistExtractor import PlistExtractor
         try:
             with open(plist_path, "rb") as fp:
-                return load(fp)
+                return PlistExtractor(schema).load(fp)
         except Exception:
             raise ValueError
 
@@ -93,9 +312,7 @@ class Workflows(object):
         Returns:
             list: list with plist filepaths
         """
-        alfred_dir = self.get_wf_directory()
-        workflow_dir_names = os.listdir(alfred_dir)
-        return [os.path.join(alfred_dir, f, "info.plist")for f in workflow_dir_names if os.path.isfile(os.path.join(alfred_dir, f, "info.plist"))]
+        return list(WorkflowIndex.scan(self.get_wf_directory()))
 
     def get_item(self, plist_path):
         """Get content of worfklow item
@@ -107,12 +324,12 @@ class Workflows(object):
             dict: Content of info.plist
         """
         try:
-            plist_info = self._get_plist_info(plist_path)
+            plist_info = self._get_plist_info(plist_path, self.PLIST_SCHEMA)
             name = plist_info.get('name')
             desc = plist_info.get('description')
             uidata = plist_info.get('uidata')
             item_objects = plist_info.get('objects')
-            user_config = plist_info.get('userconfigurationconfig')
+            resolver = VariableResolver(plist_path, plist_info.get('userconfigurationconfig'))
             keyword_list = list()
             keyb_list = list()
             for o in item_objects:
@@ -123,15 +340,7 @@ class Workflows(object):
                     uid = o.get('uid')
                     note = uidata.get(uid).get('note')
                     item_config = o.get('config')
-                    hm = item_config.get('hotmod')
-                    if hm in self.HOTMOD:
-                        hotmod = self.HOTMOD.get(hm)
-                    elif hm and hm > 0:
-                        sys.stderr.write(
-                            f"Hotmod: {str(hm)} not found in: {plist_path}")
-                        hotmod = str()
-                    else:
-                        hotmod = str()
+                    hotmod = Hotkey.decode(item_config.get('hotmod'))
                     hotstring = item_config.get('hotstring')
                     key_shortcut = u'{0} {1}'.format(
                         hotmod, hotstring) if hotmod or hotstring else None
@@ -147,18 +356,8 @@ class Workflows(object):
                     if keyword and "var:" in keyword:
                         variable = keyword.replace("var:", "").replace(
                             "{", "").replace("}", "")
-                        # build path to prefs.plist
-                        prefs_path = plist_path.replace(
-                            "info.plist", "prefs.plist")
-                        # load prefs.plist
-                        keyword = None
-                        if os.path.isfile(prefs_path):
-                            prefs = self._get_plist_info(prefs_path)
-                            keyword = prefs.get(variable)
-                        # if keyword is not being found in prefs.plist then use default value
-                        if not (keyword):
-                            keyword = self._get_user_config_variable(
-                                user_config, variable)
+                        # value from prefs.plist, default value if it is not set there
+                        keyword = resolver.resolve(variable)
                     title = item_config.get('title')
                     text = item_config.get('text')
                     title = title if title else text
@@ -178,7 +377,8 @@ class Workflows(object):
                     'path': plist_path,
                     'description': desc,
                     'keywords': keyword_list,
-                    'keyb': keyb_list
+                    'keyb': keyb_list,
+                    'disabled': bool(plist_info.get('disabled'))
                 }
         except Exception as e:
             if 'name' in locals():
@@ -187,67 +387,186 @@ class Workflows(object):
                 sys.stderr.write(f"Error: {e} ({plist_path})\n")
             return None
 
-    def _get_user_config_variable(self, user_config, variable):
-        """
-        extract user config variable from workflow
+    def get_cached_item(self, plist_path):
+        """Get content of a single workflow without loading all workflows
 
-        Args:
+        The item is taken from the catalogue while the change detector
+        rules out changes, otherwise only plist_path is parsed.
 
-            user_config (dict): user config
-            variable (str): variable to search for
+        Args:
+            plist_path (str): Path to info.plist
 
         Returns:
-
-            str: variable value
-
+            dict: Content of info.plist, None if the workflow is skipped
         """
-        ret = str()
-        for i in user_config:
-            config = i.get('config')
-            if i.get('variable').lower() == variable.lower():
-                ret = config.get('default', "")
-        return ret
+        catalogue = self.catalogue
+        if catalogue is None and self.cache_dir:
+            with profiler.span('detect'):
+                catalogue = WorkflowCatalogue.open(self._get_catalogue_path())
+                if self._is_current(catalogue):
+                    self._set_catalogue(catalogue)
+                elif catalogue is not None:
+                    catalogue.close()
+                    catalogue = None
+        if catalogue is not None:
+            wf_id = catalogue.find_path(plist_path)
+            if wf_id is not None:
+                profiler.annotate(cache='warm')
+                return catalogue.get_item(wf_id)
+        profiler.annotate(cache='cold')
+        return self.get_item(plist_path)
 
     def _get_workflows_list(self):
         """Get list of workflows, with content
 
+        Only workflows which changed since the last run are parsed,
+        all others are taken from the workflow index.
+
         Returns:
             list: List of all workflows with content (dict)
         """
-        wf_plists = self.get_workflow_plist_paths()
-        workflows = list()
-        for w in wf_plists:
-            i = self.get_item(w)
-            if i:
-                workflows.append(i)
+        self._get_index()
+        with profiler.span('scan'):
+            fingerprint = self.detector.fingerprint(self.wf_directory)
+            stamps = WorkflowIndex.scan(self.wf_directory)
+            wf_plists = list(stamps)
+            items = dict()
+            stale = list()
+            for w, stamp in stamps.items():
+                is_fresh, i = self.index.get(w, stamp)
+                if is_fresh:
+                    items[w] = i
+                else:
+                    stale.append((w, stamp))
+        stale_paths = [w for w, _ in stale]
+        profiler.annotate(cache='cold' if stale_paths else 'warm')
+        with profiler.span('parse'):
+            ingested = self._ingest(stale_paths)
+        with profiler.span('flatten'):
+            for (w, stamp), i in zip(stale, ingested):
+                if i:
+                    # taken from the scan, saves a stat per result in alf.py
+                    i['icon'] = os.path.join(os.path.dirname(w), 'icon.png') if stamp[4] else None
+                self.index.put(w, stamp, i, self._flatten_dict(i) if i else ())
+                items[w] = i
+        workflows = [items[w] for w in wf_plists if items[w]]
+        with profiler.span('index_save'):
+            self.index.prune(wf_plists)
+            self.index.save()
+            self.detector.mark_verified(self.wf_directory, self.index.get_generation(), fingerprint)
         return workflows
 
+    def _ingest(self, plist_paths):
+        """Parse info.plist files with the configured ingest backend
+
+        Args:
+            plist_paths (list): Paths to info.plist files
+
+        Returns:
+            list: Workflow items (dict or None) in the order of plist_paths
+        """
+        if self.ingest_backend == 'serial' or len(plist_paths) < 2:
+            return [self.get_item(p) for p in plist_paths]
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        cpu_count = os.cpu_count() or 1
+        if self.ingest_backend == 'process':
+            workers = min(cpu_count, len(plist_paths))
+            executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            # parsing is partly I/O bound, allow more threads than cores
+            workers = min(32, cpu_count + 4, len(plist_paths))
+            executor = ThreadPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(plist_paths) // (workers * 4))
+        with executor:
+            return list(executor.map(self.get_item, plist_paths, chunksize=chunksize))
+
     def search_in_workflows(self, search_term):
-        """Search search_term across all workflows and returns matches
+        """Search workflows matching a query
+
+        See WorkflowQuery for the query syntax
+
+        Args:
+            search_term (str): Query
+
+        Returns:
+            list: Matching workflows in name order
+        """
+        return self._filter_workflows(WorkflowQuery(search_term))
+
+    def _filter_workflows(self, query, limit=None):
+        """Get workflows matching a parsed query
+
+        Free text terms narrow the candidates down with the token
+        index and exact hotkeys with the hotkey index, the compiled
+        query is checked on the candidates only.
+
+        Args:
+            query (WorkflowQuery): Parsed query
+            limit (int, optional): Maximum number of results. Defaults to None.
+
+        Returns:
+            list: Matching workflows in name order
+        """
+        catalogue = self._get_catalogue()
+        with profiler.span('search'):
+            predicate = query.compile(self._flatten_dict)
+            # candidate sets of the token index and the hotkey index
+            id_sets = [catalogue.find(p[:WorkflowIndex.MAX_TOKEN_LENGTH]) for p in query.get_prefixes()]
+            id_sets += [catalogue.find_hotkey(mask, key) for mask, key in query.get_hotkeys()]
+            if id_sets:
+                candidates = catalogue.get_items(sorted(set.intersection(*id_sets)))
+            else:
+                candidates = catalogue.view()
+            results = list()
+            for wf in candidates:
+                if predicate(wf):
+                    results.append(wf)
+                    if limit is not None and len(results) >= limit:
+                        break
+            return results
+
+    def rank_workflows(self, search_term, limit):
+        """Search workflows and return the best matches
+
+        Queries using the WorkflowQuery syntax are filtered and kept in
+        name order, plain search terms are ranked.
 
         Args:
             search_term (str): Search term
+            limit (int): Maximum number of results
 
         Returns:
-            list: Workflows matches search
+            list: Up to limit workflows, best match first
         """
-        wfs = self.get_workflows()
-        matches = list()
-        match = False
-        for i in wfs:
-            val_list = self._flatten_dict(i)
-            for s in val_list:
-                if (
-                    isinstance(s, str) and
-                    # search_term.lower() in s.lower()
-                    re.search(r'\b' + search_term, s, re.IGNORECASE)
-                ):
-
-                    match = True
-            if match:
-                matches.append(i)
-                match = False
-        return matches
+        query = WorkflowQuery(search_term)
+        if not query.is_plain:
+            return self._filter_workflows(query, limit)
+        ranker = WorkflowRanker(search_term)
+        catalogue = self._get_catalogue()
+        count = len(catalogue)
+        generation = catalogue.generation
+        with profiler.span('search'):
+            # Matches of the previous keystroke are a complete candidate set
+            wf_ids = self.session.get_candidates(search_term, generation)
+            if wf_ids is not None and not all(isinstance(i, int) and 0 <= i < count for i in wf_ids):
+                wf_ids = None
+            is_complete = wf_ids is not None
+            if not is_complete:
+                wf_ids = catalogue.find(search_term.lower()[:WorkflowIndex.MAX_TOKEN_LENGTH])
+            candidates = [(i, catalogue.get_item(i)) for i in sorted(wf_ids)]
+            # Word prefix matches always outrank fuzzy matches, only
+            # look for fuzzy matches when there are not enough of them
+            if not is_complete and len(candidates) < limit:
+                candidates += [(i, catalogue.get_item(i)) for i in range(count) if i not in wf_ids]
+                is_complete = True
+        with profiler.span('rank'):
+            scored = [(ranker.score(wf), i, wf) for i, wf in candidates]
+            matches = [(score, i, wf) for score, i, wf in scored if score > 0]
+            top = ranker.top(matches, limit)
+        if is_complete:
+            with profiler.span('session_save'):
+                self.session.save(search_term, generation, [i for score, i, _ in scored if score > 0])
+        return top
 
     def _flatten_dict(self, tdict):
         """Flatten workflow item to list
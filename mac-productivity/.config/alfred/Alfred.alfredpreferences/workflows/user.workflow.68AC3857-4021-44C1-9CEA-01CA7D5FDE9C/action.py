@@ -3,6 +3,7 @@
 import os
 
 from Alfred3 import Items, Tools
+from Profiler import profiler
 
 # Script Filter icon [Title,Subtitle,arg/uid/icon]
 wf_items = [
@@ -13,32 +14,42 @@ wf_items = [
 ]
 
 
-cache_exists = Tools.getEnv("cache_exists")
-data_exists = Tools.getEnv("data_exists")
-
-if cache_exists == "true":
-    wf_items.append(
-        ['Open cache directory', 'Open Workflow cache in Finder', 'cache'])
-
-if data_exists == "true":
-    wf_items.append(
-        ['Open data directory', 'Open Workflow data in Finder', 'data'])
-
-# Add file manager defined in Alfred wf env
-file_manager_path = Tools.getEnv('file_manager')
-if file_manager_path and os.path.isfile(file_manager_path):
-    app_name = os.path.splitext(os.path.basename(file_manager_path))[0]
-    wf_items.append([app_name, f"Reveal in {app_name}", "file_manager"])
-
-wf = Items()
-for w in wf_items:
-    wf.setItem(
-        title=w[0],
-        subtitle=w[1],
-        arg=w[2]
-    )
-    icon_path = f'icons/{w[2]}.png'
-    wf.setIcon(icon_path, m_type='image')
-    wf.addItem()
-
-wf.write()
+def main() -> None:
+    """List actions for the selected workflow
+    """
+    actions = list(wf_items)
+    cache_exists = Tools.getEnv("cache_exists")
+    data_exists = Tools.getEnv("data_exists")
+
+    if cache_exists == "true":
+        actions.append(
+            ['Open cache directory', 'Open Workflow cache in Finder', 'cache'])
+
+    if data_exists == "true":
+        actions.append(
+            ['Open data directory', 'Open Workflow data in Finder', 'data'])
+
+    # Add file manager defined in Alfred wf env
+    file_manager_path = Tools.getEnv('file_manager')
+    if file_manager_path and os.path.isfile(file_manager_path):
+        app_name = os.path.splitext(os.path.basename(file_manager_path))[0]
+        actions.append([app_name, f"Reveal in {app_name}", "file_manager"])
+
+    wf = Items(compact=True)
+    for w in actions:
+        wf.setItem(
+            title=w[0],
+            subtitle=w[1],
+            arg=w[2]
+        )
+        icon_path = f'icons/{w[2]}.png'
+        wf.setIcon(icon_path, m_type='image')
+        wf.addItem()
+
+    profiler.annotate(results=wf.getItemsLengths())
+    with profiler.span('write'):
+        wf.write()
+
+
+if __name__ == "__main__":
+    profiler.run('action.py', main)
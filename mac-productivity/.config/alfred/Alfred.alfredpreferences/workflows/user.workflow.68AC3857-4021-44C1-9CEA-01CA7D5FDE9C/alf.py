@@ -1,10 +1,25 @@
 #!/usr/bin/python3
 
+import json
 import os
+import time
+import zlib
 
 from Alfred3 import Items, Keys, Tools
+from Profiler import profiler
 from Workflows import Workflows
 
+# Bump when the markdown layout of hint files changes
+HINT_FILE_VERSION = 1
+# Seconds between garbage collections of unused hint files
+HINT_GC_INTERVAL = 24 * 60 * 60
+HINT_GC_MARKER = 'hints.gc'
+# Number of top results which get a Quicklook hint file
+QUICKLOOK_RESULTS = 10
+# Seconds until Alfred reruns alf.py when results came from a catalogue
+# which another process is rebuilding
+STALE_RERUN_SECONDS = 0.5
+
 
 class KeywordFormatter(object):
 
@@ -62,13 +77,8 @@ class KeywordFormatter(object):
         Returns:
             string: Formatted MD content
         """
-        formatted_keywords = list()
-        result = str()
-        for i in self.keywords:
-            formatted_keywords.append(f"**{i[0]}** - {i[1]}")
-        for i in formatted_keywords:
-            result += f"* {i}\n"
-        return result if self.keywords else "* n/a"
+        from Quicklook import QuicklookRenderer
+        return QuicklookRenderer.render_keywords(self.keywords)
 
     def get_keyboard_shortcuts(self) -> list:
         """
@@ -89,24 +99,45 @@ class KeywordFormatter(object):
         Returns:
             string: formatted MD content
         """
-        formatted_keyb = list()
-        result = str()
-        for k in self.get_keyboard_shortcuts():
-            formatted_keyb.append(f"* {k}\n")
-        for fk in formatted_keyb:
-            result += f"{fk}\n"
-        return result if len(self.keyb_shortcuts) > 0 else None
+        if len(self.keyb_shortcuts) > 0:
+            from Quicklook import QuicklookRenderer
+            return QuicklookRenderer.render_shortcuts(self.get_keyboard_shortcuts())
+        return None
+
 
+def clean_cache(keep: set) -> None:
+    """Remove .md files in cache directory which are no longer used
 
-def clean_cache() -> None:
-    """Remove all .md files in cache directory
+    Args:
+        keep (set): File names of hint files to keep
     """
     cache_dir = get_cache_directory()
     file_list = os.listdir(cache_dir)
     for f in file_list:
-        if f.endswith('.md'):
+        if f.endswith('.md') and f not in keep:
             f_path = os.sep.join([cache_dir, f])
-            os.remove(f_path)
+            try:
+                os.remove(f_path)
+            except FileNotFoundError:
+                pass
+
+
+def collect_hint_files(wf: Workflows) -> None:
+    """Garbage collect unused hint files, at most once per HINT_GC_INTERVAL
+
+    Args:
+        wf (Workflows): Workflows with all current workflow items
+    """
+    marker = os.path.join(get_cache_directory(), HINT_GC_MARKER)
+    try:
+        last_run = os.path.getmtime(marker)
+    except OSError:
+        last_run = 0
+    if time.time() - last_run < HINT_GC_INTERVAL:
+        return
+    clean_cache({get_hint_file_name(i) for i in wf.workflows})
+    with open(marker, 'w'):
+        pass
 
 
 def get_cache_directory() -> str:
@@ -116,115 +147,182 @@ def get_cache_directory() -> str:
         str: Cache Directory
     """
     target_dir = Tools.getEnv('alfred_workflow_cache')
-    if not (os.path.isdir(target_dir)):
-        os.mkdir(target_dir)
+    # concurrent runs may create it at the same time
+    os.makedirs(target_dir, exist_ok=True)
     return target_dir
 
 
-def create_hint_file(wf_dir: str, content: str) -> str:
-    """Creates hint file.md in workflow cache
+def get_hint_file_name(wf_item: dict) -> str:
+    """Get content addressed hint file name of a workflow
 
     Args:
-        wf_dir (str): Directory name of a specific workflow
-        content (str): content to write into md file
+        wf_item (dict): Workflow item
+
+    Returns:
+        str: File name, changes whenever the workflow item changes
+    """
+    # crc32 and adler32 instead of hashlib, loading OpenSSL costs more than all hashing
+    record = json.dumps([HINT_FILE_VERSION, wf_item], sort_keys=True, default=str).encode('utf-8')
+    return f"{zlib.crc32(record):08x}{zlib.adler32(record):08x}.md"
+
+
+def render_hint_file(name: str, description: str, kf: KeywordFormatter) -> bytes:
+    """Render markdown content of a hint file
+
+    Quicklook (string.Template) is imported here, warm runs find all hint files on disk.
+
+    Args:
+        name (str): Workflow name
+        description (str): Workflow description
+        kf (KeywordFormatter): Keywords and keyboard shortcuts of the workflow
+
+    Returns:
+        bytes: Content of the hint file
+    """
+    from Quicklook import QuicklookRenderer
+    return QuicklookRenderer.render(name, description, kf.get_keywords_md(), kf.get_keyb_md())
+
+
+def create_hint_file(wf_item: dict, render) -> str:
+    """Creates hint file.md in workflow cache unless it already exists
+
+    Args:
+        wf_item (dict): Workflow item the content is generated from
+        render (callable): returns the content (bytes) to write into md file,
+            only called when the file does not exist yet
 
     Returns:
         str: Target file path for quicklookurl
     """
-    target_dir = get_cache_directory()
-    spath = os.path.normpath(wf_dir).split(os.sep)
-    wf_dir_name = ''.join(
-        [i for i in spath if str(i).startswith('user.workflow')])
-    if wf_dir_name != str():
-        target_file = f"{target_dir}/{wf_dir_name}.md"
-        with open(target_file, "wb+") as f:
-            f.write(content)
-            return target_file
-
-
-Tools.logPyVersion()
-Workflows = Workflows()
-query = Tools.getArgv(1)
-matches = Workflows.get_workflows() if query == str(
-) else Workflows.search_in_workflows(query)
-
-clean_cache()
-alf = Items()
-if len(matches) > 0:
-    for m in matches:
-        # init Keyword and Keyboard text formatter for markdown output
-        kf = KeywordFormatter()
-        # WF description
-        description = m.get('description') if m.get('description') else ' - '
-        # WF name
-        name = m.get('name')
-        # Read WF keyboard shortcuts
-        keyb_list = m.get('keyb')
-        for k in keyb_list:
-            note = k.get('note')
-            keyb = k.get('keyb')
-            kf.add_keyb(f'{keyb} : {note}')
-        # Get list of keywords
-        keyword_list = m.get('keywords')
-        info_plist_path = m.get('path')
-        wf_path = os.path.dirname(info_plist_path)
-        for kitem in keyword_list:
-            keyword = kitem.get('keyword')
-            text = kitem.get('text') if kitem.get('text') else str()
-            title = kitem.get('title') if kitem.get('title') else text
-            kf.add_keyword_title(keyword, title)
-        # Create Content for md file
-        content = ((
-            "# %s\n"
-            "\n"
-            "### Description\n"
-            "* %s\n"
-            "\n"
-            "### Keywords\n"
-            "%s"
-        ) % (name, description, kf.get_keywords_md())).encode('utf-8')
-        # Add keyboard shortcuts if available to the md content
-        if kf.get_keyb_md():
-            # content += ("\n\n### Shortcuts\n%s" % (kf.get_keyb_md())).encode('utf-8')
-            content += f"\n\n### Shortcuts\n{kf.get_keyb_md()}".encode('utf-8')
-
-        # Quicklook file URL
-        quicklook_url = create_hint_file(wf_path, content)
-        ip = wf_path + "/icon.png"
-        # use default icon in alf WF directory in case searched wf has not icon defined
-        icon_path = ip if os.path.isfile(ip) else 'icon.png'
-        keyword_text = kf.get_keywords_scriptfilter()
-        valid = kf.has_keywords()
-        subtitle = description + \
-            u', Keywords: ' + \
-            keyword_text if valid else description
-        if len(kf.get_keyboard_shortcuts()) > 0:
-            #    subtitle += ", Keyboard: " + ",".join(kf.get_keyboard_shortcuts())
-            subtitle += f', Keyboard shortcuts → press {Keys.SHIFT}'
-        arg = os.path.dirname(info_plist_path) + "|" + name
+    target_file = os.path.join(get_cache_directory(), get_hint_file_name(wf_item))
+    if not os.path.isfile(target_file):
+        tmp_file = f"{target_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(render())
+        os.replace(tmp_file, target_file)
+    return target_file
+
+
+def get_icon_path(wf_item: dict) -> str:
+    """Get icon of a workflow, checked on disk for each shown result
+
+    The icon in the record is only as current as the last verification,
+    adding or removing an icon.png does not change the workflows directory.
+
+    Args:
+        wf_item (dict): Workflow item
+
+    Returns:
+        str: Path to the workflow's icon.png, the default icon.png of this workflow if it has none
+    """
+    icon_path = os.path.join(os.path.dirname(wf_item.get('path')), 'icon.png')
+    return icon_path if os.path.isfile(icon_path) else 'icon.png'
+
+
+def get_max_results() -> int:
+    """Get maximum number of results shown in Alfred
+
+    Returns:
+        int: max_results workflow variable, defaults to 50
+    """
+    try:
+        return max(1, int(Tools.getEnv('max_results', '50')))
+    except ValueError:
+        return 50
+
+
+def main(wf: Workflows = None) -> None:
+    """Search workflows and write the Script Filter output
+
+    Args:
+        wf (Workflows, optional): Up to date workflows, e.g. kept by server.py. Defaults to None.
+    """
+    Tools.logPyVersion()
+    wf = Workflows() if wf is None else wf
+    query = Tools.getArgv(1)
+    max_results = get_max_results()
+    matches = wf.get_workflows()[:max_results] if query == str(
+    ) else wf.rank_workflows(query, max_results)
+    profiler.annotate(query=query, results=len(matches))
+
+    alf = Items(compact=True, max_results=max_results)
+    # results are ranked, Alfred must not reorder them
+    alf.setSkipKnowledge()
+    # no Alfred cache: it does not depend on the query, a cached empty
+    # query response would be shown for the next typed query as well
+    if wf.is_stale:
+        alf.setRerun(STALE_RERUN_SECONDS)
+    if len(matches) > 0:
+        for index, m in enumerate(matches):
+            # init Keyword and Keyboard text formatter for markdown output
+            kf = KeywordFormatter()
+            # WF description
+            description = m.get('description') if m.get('description') else ' - '
+            # WF name
+            name = m.get('name')
+            # Read WF keyboard shortcuts
+            keyb_list = m.get('keyb')
+            for k in keyb_list:
+                note = k.get('note')
+                keyb = k.get('keyb')
+                kf.add_keyb(f'{keyb} : {note}')
+            # Get list of keywords
+            keyword_list = m.get('keywords')
+            info_plist_path = m.get('path')
+            for kitem in keyword_list:
+                keyword = kitem.get('keyword')
+                text = kitem.get('text') if kitem.get('text') else str()
+                title = kitem.get('title') if kitem.get('title') else text
+                kf.add_keyword_title(keyword, title)
+            # Quicklook file URL, hint files are only needed for the top results
+            quicklook_url = None
+            if index < QUICKLOOK_RESULTS:
+                with profiler.span('markdown'):
+                    quicklook_url = create_hint_file(m, lambda: render_hint_file(name, description, kf))
+            # use default icon in alf WF directory in case searched wf has not icon defined
+            icon_path = get_icon_path(m)
+            keyword_text = kf.get_keywords_scriptfilter()
+            valid = kf.has_keywords()
+            subtitle = description + \
+                u', Keywords: ' + \
+                keyword_text if valid else description
+            if len(kf.get_keyboard_shortcuts()) > 0:
+                #    subtitle += ", Keyboard: " + ",".join(kf.get_keyboard_shortcuts())
+                subtitle += f', Keyboard shortcuts → press {Keys.SHIFT}'
+            arg = os.path.dirname(info_plist_path) + "|" + name
+            alf.setItem(
+                title=name,
+                subtitle=subtitle,
+                arg=arg,
+                automcomplete=name,
+                valid=valid
+            )
+            if quicklook_url:
+                alf.setKv('quicklookurl', quicklook_url)
+            alf.setIcon(icon_path, m_type="image")
+            alf.addMod(
+                'cmd',
+                subtitle='Choose Action...',
+                arg=arg,
+                icon_path='icons/start.png',
+                icon_type='image',
+                valid=True
+            )
+            alf.addItem()
+    else:
         alf.setItem(
-            title=name,
-            subtitle=subtitle,
-            arg=arg,
-            automcomplete=name,
-            valid=valid,
-            quicklookurl=quicklook_url
-        )
-        alf.setIcon(icon_path, m_type="image")
-        alf.addMod(
-            'cmd',
-            subtitle='Choose Action...',
-            arg=arg,
-            icon_path='icons/start.png',
-            icon_type='image',
-            valid=True
+            title='No Workflow matches the search query!',
+            subtitle=f"...for query: \"{query}\"",
+            valid=False
         )
         alf.addItem()
-else:
-    alf.setItem(
-        title='No Workflow matches the search query!',
-        subtitle=f"...for query: \"{query}\"",
-        valid=False
-    )
-    alf.addItem()
-alf.write()
+    with profiler.span('write'):
+        alf.write()
+    # a stale catalogue would remove hint files of updated workflows
+    if not wf.is_stale:
+        with profiler.span('hint_gc'):
+            collect_hint_files(wf)
+
+
+if __name__ == "__main__":
+    profiler.run('alf.py', main)
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import os
+import socket
+import sys
+import time
+
+"""
+Thin client for server.py, keeps the per keystroke import cost minimal.
+Runs the requested script in-process when the server is not available.
+
+Usage: client.py <script> <query>
+"""
+
+SOCKET_NAME = 'server.sock'
+# Seconds to wait for the server before running the script in-process
+# without spawning another server
+TIMEOUT = 5
+SEPARATOR = b'\0'
+# Request variable with the start time of the client process, the
+# server measures the latency of the run from there
+STARTED_ENV_NAME = 'alf_started'
+
+
+def get_socket_path() -> str:
+    """Get path of the server socket in the workflow data directory
+
+    Returns:
+        str: Socket path
+    """
+    return os.path.join(os.getenv('alfred_workflow_data', ''), SOCKET_NAME)
+
+
+def encode_request(script: str, query: str, env: dict) -> bytes:
+    """Encode a request as NUL separated fields: script, query, KEY=VALUE...
+
+    Args:
+        script (str): Script name e.g. alf.py
+        query (str): Alfred query
+        env (dict): Environment of the request
+
+    Returns:
+        bytes: Encoded request
+    """
+    fields = [script, query] + [f"{k}={v}" for k, v in env.items()]
+    return SEPARATOR.join(f.encode('utf-8', 'surrogateescape') for f in fields)
+
+
+def request(script: str, query: str) -> tuple:
+    """Send request to the server
+
+    Args:
+        script (str): Script name
+        query (str): Alfred query
+
+    Raises:
+        OSError: if the server is not available or does not answer
+
+    Returns:
+        tuple: Exit status (int), stdout and stderr (bytes) of the script
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(TIMEOUT)
+        s.connect(get_socket_path())
+        env = dict(os.environ)
+        env[STARTED_ENV_NAME] = repr(time.time() - time.process_time())
+        s.sendall(encode_request(script, query, env))
+        s.shutdown(socket.SHUT_WR)
+        chunks = list()
+        while True:
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    fields = b''.join(chunks).split(SEPARATOR, 2)
+    if len(fields) < 3 or not fields[0].isdigit():
+        raise ConnectionError('Incomplete response from server')
+    return int(fields[0]), fields[1], fields[2]
+
+
+def spawn_server() -> None:
+    """Start server.py in the background
+    """
+    import subprocess
+    server = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py')
+    subprocess.Popen(
+        [sys.executable, server],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+
+
+def run_local(script: str, query: str) -> None:
+    """Run script in this process
+
+    Args:
+        script (str): Script name
+        query (str): Alfred query
+    """
+    import runpy
+    sys.argv = [script, query]
+    runpy.run_path(script, run_name='__main__')
+
+
+def main() -> None:
+    script = sys.argv[1]
+    query = sys.argv[2] if len(sys.argv) > 2 else str()
+    try:
+        status, stdout, stderr = request(script, query)
+    except (FileNotFoundError, ConnectionRefusedError):
+        # no server is listening on the socket
+        spawn_server()
+        run_local(script, query)
+        return
+    except OSError:
+        # the server is busy, e.g. with a cold rebuild, or failed to answer.
+        # Another server would only repeat its work, run without it.
+        run_local(script, query)
+        return
+    sys.stderr.buffer.write(stderr)
+    sys.stdout.buffer.write(stdout)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
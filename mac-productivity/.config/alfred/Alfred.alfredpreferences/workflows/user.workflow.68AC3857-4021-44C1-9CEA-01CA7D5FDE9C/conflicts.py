@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+import json
+import os
+import sys
+
+from Alfred3 import Items, Tools
+from Hotkey import Hotkey
+from Workflows import Workflows
+
+REPORT_FILE_NAME = 'conflicts.json'
+
+
+def find_conflicts(workflows) -> dict:
+    """Find keywords and hotkeys used by more than one enabled workflow
+
+    Every workflow is visited once, keywords (var: keywords already
+    resolved by Workflows.get_item) and hotkeys are collected in dicts.
+
+    Args:
+        workflows (iterable): Workflow items
+
+    Returns:
+        dict: 'keywords' and 'hotkeys', lists of conflicts sorted by the keyword or hotkey
+    """
+    keywords = dict()
+    hotkeys = dict()
+    for wf in workflows:
+        if wf.get('disabled'):
+            continue
+        owner = {'name': wf.get('name'), 'path': wf.get('path')}
+        for k in wf.get('keywords', []):
+            keyword = k.get('keyword')
+            if isinstance(keyword, str) and keyword.strip():
+                owners = keywords.setdefault(keyword.strip().lower(), dict())
+                owners.setdefault(owner['path'], owner)
+        for k in wf.get('keyb', []):
+            hotkey = Hotkey.parse_display(k.get('keyb'))
+            # without a key it is not a hotkey Alfred listens to
+            if hotkey is None or not hotkey[1]:
+                continue
+            owners = hotkeys.setdefault(hotkey, dict())
+            owners.setdefault(owner['path'], owner)
+    return {
+        'keywords': [
+            {'keyword': keyword, 'workflows': list(owners.values())}
+            for keyword, owners in sorted(keywords.items()) if len(owners) > 1
+        ],
+        'hotkeys': [
+            {'hotkey': f'{Hotkey.decode(mask)} {key.upper()}'.strip(), 'workflows': list(owners.values())}
+            for (mask, key), owners in sorted(hotkeys.items()) if len(owners) > 1
+        ]
+    }
+
+
+def write_report(report: dict) -> str:
+    """Write the report to the workflow data directory
+
+    Args:
+        report (dict): Conflicts as returned by find_conflicts
+
+    Returns:
+        str: Path of the report, None if it could not be written
+    """
+    path = os.path.join(Tools.getDataDir(), REPORT_FILE_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as fp:
+            json.dump(report, fp, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        sys.stderr.write(f"Error: {e} ({path})\n")
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+        return None
+    return path
+
+
+def main(wf: Workflows = None) -> None:
+    """List keywords and hotkeys used by more than one workflow
+
+    Args:
+        wf (Workflows, optional): Up to date workflows, e.g. kept by server.py. Defaults to None.
+    """
+    wf = Workflows() if wf is None else wf
+    query = Tools.getArgv(1).lower()
+    report = find_conflicts(wf.workflows)
+    report_path = write_report(report)
+
+    alf = Items(compact=True)
+    conflicts = [('Keyword', c['keyword'], c) for c in report['keywords']]
+    conflicts += [('Hotkey', c['hotkey'], c) for c in report['hotkeys']]
+    for kind, value, c in conflicts:
+        names = [w.get('name') or os.path.basename(os.path.dirname(w.get('path'))) for w in c['workflows']]
+        if query and query not in value.lower() and not any(query in n.lower() for n in names):
+            continue
+        alf.setItem(
+            title=f'{kind} {value} is used by {len(names)} workflows',
+            subtitle=', '.join(names),
+            valid=False,
+            quicklookurl=report_path
+        )
+        alf.setIcon('icon.png', m_type='image')
+        alf.addItem()
+    if alf.getItemsLengths() == 0:
+        if conflicts:
+            alf.setItem(
+                title='No conflicts match the query',
+                subtitle=f'{len(conflicts)} conflicts in total',
+                valid=False
+            )
+        else:
+            alf.setItem(
+                title='No conflicts found',
+                subtitle='Keywords and hotkeys of the enabled workflows are unique',
+                valid=False
+            )
+        alf.addItem()
+    alf.write()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import os
+import platform
+import plistlib
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+"""
+Benchmark of the Script Filter entry points on a synthetic Alfred
+preferences tree.
+
+Generates `workflows` directories with N workflows each and times cold
+(empty workflow cache) and warm runs of alf.py, keywords.py and action.py.
+Results are written as JSON to compare them across commits.
+
+Usage: bench.py [--workflows N [N ...]] [--repeat R] [--output FILE]
+"""
+
+WF_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = [
+    'alfred', 'bookmark', 'calendar', 'clipboard', 'color', 'contacts', 'convert', 'currency',
+    'dictionary', 'docker', 'emoji', 'finder', 'git', 'github', 'hash', 'json', 'kill', 'mail',
+    'markdown', 'music', 'network', 'notes', 'password', 'process', 'reminder', 'safari', 'search',
+    'snippet', 'spotify', 'ssh', 'terminal', 'timer', 'todo', 'translate', 'uuid', 'vpn', 'weather',
+    'wifi', 'window', 'zoom'
+]
+INPUT_TYPES = [
+    'alfred.workflow.input.scriptfilter',
+    'alfred.workflow.input.keyword',
+    'alfred.workflow.input.listfilter',
+    'alfred.workflow.input.filefilter'
+]
+# hotmod values used by Alfred: shift, ctrl, opt, cmd and combinations, fn and none
+HOTMODS = [0, 131072, 262144, 524288, 1048576, 1179648, 1572864, 1835008, 8388608]
+# Share of workflows with the property
+DISABLED_RATIO = 0.1
+VAR_KEYWORD_RATIO = 0.15
+PREFS_RATIO = 0.5
+HOTKEY_RATIO = 0.4
+
+SHORT_QUERY = 'no'
+LONG_QUERY = 'clipboard manager with snippets'
+
+
+class TreeGenerator(object):
+
+    def __init__(self, seed: int = 0) -> None:
+        """Generator of synthetic Alfred preferences trees
+
+        Args:
+            seed (int, optional): Seed, the same seed generates the same tree. Defaults to 0.
+        """
+        self.rnd = random.Random(seed)
+
+    def _uid(self) -> str:
+        h = '%032X' % self.rnd.getrandbits(128)
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def _words(self, count: int) -> str:
+        return ' '.join(self.rnd.choice(WORDS) for _ in range(count))
+
+    def _script(self) -> str:
+        lines = [f"# {self._words(6)}"] + [f"echo '{self._words(4)}'" for _ in range(self.rnd.randint(5, 40))]
+        return '\n'.join(lines)
+
+    def get_workflow(self) -> tuple:
+        """Generate content of a workflow
+
+        Returns:
+            tuple: info.plist content (dict), prefs.plist content (dict) or None
+        """
+        objects = list()
+        uidata = dict()
+        user_config = list()
+        prefs = None
+        for n in range(self.rnd.randint(1, 4)):
+            uid = self._uid()
+            keyword = f"{self.rnd.choice(WORDS)[:self.rnd.randint(2, 5)]}{n}"
+            if self.rnd.random() < VAR_KEYWORD_RATIO:
+                variable = f"keyword_{n}"
+                user_config.append({
+                    'config': {'default': keyword, 'placeholder': '', 'required': False, 'trim': True},
+                    'description': 'Keyword',
+                    'label': 'Keyword',
+                    'type': 'textfield',
+                    'variable': variable
+                })
+                if self.rnd.random() < PREFS_RATIO:
+                    prefs = prefs or dict()
+                    prefs[variable] = f"{keyword}x"
+                keyword = f"{{var:{variable}}}"
+            objects.append({
+                'config': {
+                    'keyword': keyword,
+                    'title': self._words(3).title(),
+                    'text': self._words(4),
+                    'withspace': self.rnd.random() < 0.5,
+                    'script': self._script(),
+                    'scriptargtype': 1,
+                    'type': 0
+                },
+                'type': self.rnd.choice(INPUT_TYPES),
+                'uid': uid,
+                'version': 3
+            })
+            uidata[uid] = {'xpos': 50.0, 'ypos': 50.0 + n * 120}
+        if self.rnd.random() < HOTKEY_RATIO:
+            uid = self._uid()
+            objects.append({
+                'config': {
+                    'hotkey': self.rnd.randint(0, 50),
+                    'hotmod': self.rnd.choice(HOTMODS),
+                    'hotstring': self.rnd.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ'),
+                    'modsmode': 0
+                },
+                'type': 'alfred.workflow.trigger.hotkey',
+                'uid': uid,
+                'version': 2
+            })
+            uidata[uid] = {'note': self._words(3), 'xpos': 50.0, 'ypos': 500.0}
+        info = {
+            'bundleid': f"com.example.{self._uid().lower()}",
+            'connections': dict(),
+            'createdby': 'bench',
+            'description': self._words(self.rnd.randint(0, 8)),
+            'disabled': self.rnd.random() < DISABLED_RATIO,
+            'name': self._words(self.rnd.randint(1, 3)).title(),
+            'objects': objects,
+            'readme': '\n'.join(self._words(12) for _ in range(self.rnd.randint(0, 30))),
+            'uidata': uidata,
+            'userconfigurationconfig': user_config,
+            'version': '1.0'
+        }
+        return info, prefs
+
+    def generate(self, preferences_dir: str, count: int) -> list:
+        """Write workflows directory with count workflows
+
+        Args:
+            preferences_dir (str): Alfred preferences directory, used as alfred_preferences
+            count (int): Number of workflows
+
+        Returns:
+            list: Directories of the enabled workflows
+        """
+        icon = os.path.join(WF_DIR, 'icon.png')
+        enabled = list()
+        for _ in range(count):
+            wf_dir = os.path.join(preferences_dir, 'workflows', f"user.workflow.{self._uid()}")
+            os.makedirs(wf_dir)
+            info, prefs = self.get_workflow()
+            with open(os.path.join(wf_dir, 'info.plist'), 'wb') as fp:
+                plistlib.dump(info, fp)
+            if prefs:
+                with open(os.path.join(wf_dir, 'prefs.plist'), 'wb') as fp:
+                    plistlib.dump(prefs, fp)
+            if self.rnd.random() < 0.5:
+                shutil.copyfile(icon, os.path.join(wf_dir, 'icon.png'))
+            if not info['disabled']:
+                enabled.append(wf_dir)
+        return enabled
+
+
+class Benchmark(object):
+
+    def __init__(self, preferences_dir: str, selected_wf: str, tmp_dir: str, repeat: int) -> None:
+        """Timing of the entry points against a preferences tree
+
+        Args:
+            preferences_dir (str): Alfred preferences directory
+            selected_wf (str): Workflow directory passed to keywords.py
+            tmp_dir (str): Directory for workflow cache and data
+            repeat (int): Runs per scenario and cache state
+        """
+        self.repeat = repeat
+        self.cache_dir = os.path.join(tmp_dir, 'cache')
+        self.data_dir = os.path.join(tmp_dir, 'data')
+        self.env = dict(os.environ)
+        self.env.update({
+            'alfred_preferences': preferences_dir,
+            'alfred_workflow_cache': self.cache_dir,
+            'alfred_workflow_data': self.data_dir,
+            'exclude_disabled': '1',
+            'plist_path': selected_wf,
+        })
+        # bytecode caching like in Alfred, otherwise every run compiles all modules
+        self.env.pop('PYTHONDONTWRITEBYTECODE', None)
+        for k in ('alf_profile', 'alf_cprofile', 'alfred_debug', 'server_mode'):
+            self.env.pop(k, None)
+
+    def clear_cache(self) -> None:
+        for d in (self.cache_dir, self.data_dir):
+            shutil.rmtree(d, ignore_errors=True)
+
+    def run(self, script: str, query: str) -> float:
+        """Run entry point once
+
+        Args:
+            script (str): Entry point e.g. alf.py
+            query (str): Alfred query
+
+        Returns:
+            float: Wall time in ms
+        """
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, script, query], cwd=WF_DIR, env=self.env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        elapsed = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            sys.exit(f"{script} {query!r} failed:\n{proc.stderr.decode('utf-8', 'replace')}")
+        return elapsed
+
+    def measure(self, script: str, query: str) -> list:
+        """Time cold and warm runs of an entry point
+
+        Args:
+            script (str): Entry point
+            query (str): Alfred query
+
+        Returns:
+            list: Result records for the cold and the warm state
+        """
+        cold = list()
+        for _ in range(self.repeat):
+            self.clear_cache()
+            cold.append(self.run(script, query))
+        # the last cold run left a warm cache behind
+        warm = [self.run(script, query) for _ in range(self.repeat)]
+        return [self.get_record(script, query, 'cold', cold), self.get_record(script, query, 'warm', warm)]
+
+    @staticmethod
+    def get_record(script: str, query: str, state: str, runs: list) -> dict:
+        return {
+            'script': script,
+            'query': query,
+            'state': state,
+            'min_ms': round(min(runs), 2),
+            'median_ms': round(statistics.median(runs), 2),
+            'max_ms': round(max(runs), 2),
+            'runs_ms': [round(r, 2) for r in runs]
+        }
+
+
+def get_commit() -> str:
+    """Get current git commit of the workflow
+
+    Returns:
+        str: Commit hash, None outside of a git checkout
+    """
+    try:
+        proc = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=WF_DIR, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, universal_newlines=True)
+    except OSError:
+        return None
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the Script Filter entry points')
+    parser.add_argument('--workflows', type=int, nargs='+', default=[10, 100, 1000],
+                        help='Number of generated workflows (10 to 10000), one tree per value')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per scenario and cache state')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the tree generator')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    args = parser.parse_args()
+    if any(not 10 <= n <= 10000 for n in args.workflows):
+        parser.error('--workflows must be between 10 and 10000')
+
+    scenarios = [
+        ('alf.py', ''),
+        ('alf.py', SHORT_QUERY),
+        ('alf.py', LONG_QUERY),
+        ('keywords.py', ''),
+        ('action.py', ''),
+    ]
+    report = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'trees': list()
+    }
+    for count in args.workflows:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            preferences_dir = os.path.join(tmp_dir, 'Alfred.alfredpreferences')
+            enabled = TreeGenerator(args.seed).generate(preferences_dir, count)
+            bench = Benchmark(preferences_dir, enabled[0], tmp_dir, args.repeat)
+            results = list()
+            for script, query in scenarios:
+                results.extend(bench.measure(script, query))
+            report['trees'].append({'workflows': count, 'results': results})
+            sys.stderr.write(f"{count} workflows done\n")
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            fp.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+"""
+Startup-time budget of the Script Filter entry points.
+
+Runs every entry point twice with `python3 -X importtime`, the first run
+warms the workflow index and the Quicklook hint files, the second run is
+measured. Fails if a warm run imports a module of FORBIDDEN_MODULES or if
+its imports take longer than the budget.
+
+Usage: check_importtime.py [--budget-ms MS] [--query QUERY]
+"""
+
+# Modules only needed to rebuild the index or to render hint files
+FORBIDDEN_MODULES = [
+    'plistlib',
+    'xml.parsers.expat',
+    'hashlib',
+    'string',
+    'concurrent.futures',
+]
+# Milliseconds of cumulative import time allowed per warm run
+BUDGET_MS = 40
+
+WF_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_environment(tmp_dir: str) -> dict:
+    """Get an Alfred like environment with its own cache and data directory
+
+    Args:
+        tmp_dir (str): Directory for workflow cache and data
+
+    Returns:
+        dict: Environment, alfred_preferences defaults to the enclosing preferences
+    """
+    env = dict(os.environ)
+    env.setdefault('alfred_preferences', os.path.dirname(os.path.dirname(WF_DIR)))
+    env.setdefault('exclude_disabled', '1')
+    env['alfred_workflow_cache'] = os.path.join(tmp_dir, 'cache')
+    env['alfred_workflow_data'] = os.path.join(tmp_dir, 'data')
+    env['plist_path'] = WF_DIR
+    # Alfred runs the scripts with bytecode caching, the cold run writes __pycache__
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env.pop('server_mode', None)
+    env.pop('alf_profile', None)
+    env.pop('alf_cprofile', None)
+    env.pop('alfred_debug', None)
+    return env
+
+
+def parse_importtime(stderr: str) -> tuple:
+    """Parse output of -X importtime
+
+    Args:
+        stderr (str): stderr of the python process
+
+    Returns:
+        tuple: total microseconds of all top level imports, set of imported modules
+    """
+    total = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if not cumulative.strip().isdigit():
+            # header line
+            continue
+        modules.add(name.strip())
+        if not name.startswith('  '):
+            total += int(cumulative)
+    return total, modules
+
+
+def measure(script: str, query: str, env: dict) -> tuple:
+    """Run script cold and warm, measure imports of the warm run
+
+    Args:
+        script (str): Entry point e.g. alf.py
+        query (str): Alfred query
+        env (dict): Environment
+
+    Returns:
+        tuple: total microseconds of imports, set of imported modules
+    """
+    cmd = [sys.executable, '-X', 'importtime', script, query]
+    for _ in range(2):
+        proc = subprocess.run(cmd, cwd=WF_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                              universal_newlines=True)
+        if proc.returncode != 0:
+            sys.exit(f"{script} failed:\n{proc.stderr}")
+    return parse_importtime(proc.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Check import time of the Script Filter entry points')
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS, help='Budget per warm run in ms')
+    parser.add_argument('--query', default='a', help='Query used for alf.py')
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = get_environment(tmp_dir)
+        for script, query in [('alf.py', ''), ('alf.py', args.query), ('keywords.py', ''), ('action.py', '')]:
+            total, modules = measure(script, query, env)
+            forbidden = [m for m in FORBIDDEN_MODULES if m in modules]
+            ms = total / 1000
+            ok = ms <= args.budget_ms and not forbidden
+            failed = failed or not ok
+            label = f"{script} {query!r}"
+            print(f"{'ok  ' if ok else 'FAIL'} {label:<20} {ms:7.1f} ms / {args.budget_ms:.0f} ms"
+                  + (f", forbidden: {', '.join(forbidden)}" if forbidden else ''))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,46 @@
 #!/usr/bin/python3
 from Alfred3 import Items, Tools
+from Profiler import profiler
 from Workflows import Workflows
 
-wf = Workflows()
-alf = Items()
-wpath = f"{Tools.getEnv('plist_path')}/info.plist"
 
-keyword_list = wf.get_item(wpath).get('keywords')
-if keyword_list:
-    for k in keyword_list:
-        withspace = k.get('withspace')
-        keyw = k.get('keyword')
-        keyword = f'{keyw} ' if withspace and keyw else keyw
-        title = k.get('title')
-        text = k.get('text')
-        if keyword:
-            alf.setItem(
-                title=title,
-                subtitle=f'Press \u23CE to proceed with Keyword: {keyword}',
-                arg=keyword
-            )
-            alf.setIcon('icons/start.png', m_type='image')
-            alf.addItem()
-else:
-    alf.setItem(
-        title="This workflow has not keywords defined",
-        valid=False
-    )
-alf.write()
+def main(wf: Workflows = None) -> None:
+    """List keywords of the selected workflow
+
+    Args:
+        wf (Workflows, optional): Up to date workflows, e.g. kept by server.py. Defaults to None.
+    """
+    wf = Workflows() if wf is None else wf
+    alf = Items(compact=True)
+    wpath = f"{Tools.getEnv('plist_path')}/info.plist"
+
+    with profiler.span('parse'):
+        item = wf.get_cached_item(wpath)
+    keyword_list = item.get('keywords') if item else None
+    if keyword_list:
+        for k in keyword_list:
+            withspace = k.get('withspace')
+            keyw = k.get('keyword')
+            keyword = f'{keyw} ' if withspace and keyw else keyw
+            title = k.get('title')
+            text = k.get('text')
+            if keyword:
+                alf.setItem(
+                    title=title,
+                    subtitle=f'Press \u23CE to proceed with Keyword: {keyword}',
+                    arg=keyword
+                )
+                alf.setIcon('icons/start.png', m_type='image')
+                alf.addItem()
+    else:
+        alf.setItem(
+            title="This workflow has not keywords defined",
+            valid=False
+        )
+    profiler.annotate(results=alf.getItemsLengths())
+    with profiler.span('write'):
+        alf.write()
+
+
+if __name__ == "__main__":
+    profiler.run('keywords.py', main)
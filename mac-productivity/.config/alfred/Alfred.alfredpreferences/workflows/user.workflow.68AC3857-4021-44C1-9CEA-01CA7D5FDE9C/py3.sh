@@ -23,7 +23,13 @@ CONFIG_PREFIX="Config"
 DEBUG=0
 
 pyrun() {
-  $py3 "${SCR}" "${QUERY}"
+  if [ "$server_mode" = "1" ]
+  then
+    #Thin client, the script runs in the resident server.py
+    $py3 -S client.py "${SCR}" "${QUERY}"
+  else
+    $py3 "${SCR}" "${QUERY}"
+  fi
   RES=$?
   [[ $RES -eq 127 ]] && handle_py_notfound
   return $RES
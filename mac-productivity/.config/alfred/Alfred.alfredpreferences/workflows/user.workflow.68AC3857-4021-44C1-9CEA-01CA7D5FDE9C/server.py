@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import fcntl
+import io
+import os
+import socketserver
+import sys
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+import action
+import alf
+import conflicts
+import keywords
+import stats
+from ChangeDetector import get_watcher
+from Profiler import profiler
+from client import SEPARATOR, STARTED_ENV_NAME, get_socket_path
+from Workflows import Workflows
+
+"""
+Resident server for the Script Filters, keeps the workflow index in
+memory and answers requests of client.py on a Unix domain socket.
+Shuts down after being idle for `server_idle_timeout` seconds.
+"""
+
+IDLE_TIMEOUT = 300
+LOCK_NAME = 'server.lock'
+# Variables of the request environment the kept Workflows object is built
+# from, it is replaced when one of them changes
+WORKFLOWS_ENV = ['alfred_preferences', 'alfred_workflow_cache', 'exclude_disabled']
+
+
+class ScriptServer(socketserver.UnixStreamServer):
+
+    def __init__(self, socket_path: str, idle_timeout: int) -> None:
+        """Single threaded server running one script request at a time
+
+        Args:
+            socket_path (str): Path of the Unix domain socket
+            idle_timeout (int): Seconds without request until shutdown
+        """
+        self.workflows = None
+        self.workflows_env = None
+        self.watcher = None
+        self.is_idle = False
+        self.code_stamp = self.get_code_stamp()
+        super().__init__(socket_path, ScriptHandler)
+        self.timeout = idle_timeout
+
+    @staticmethod
+    def get_code_stamp() -> list:
+        """Get modification times of the workflow's python files
+
+        Returns:
+            list: mtimes of all .py files next to server.py
+        """
+        wf_dir = os.path.dirname(os.path.abspath(__file__))
+        return sorted(
+            os.path.getmtime(os.path.join(wf_dir, f)) for f in os.listdir(wf_dir) if f.endswith('.py'))
+
+    def get_workflows(self) -> Workflows:
+        """Get workflows kept in memory, updated with changes on disk
+
+        Returns:
+            Workflows: Up to date workflows for the environment of the current request
+        """
+        env = [os.getenv(k) for k in WORKFLOWS_ENV]
+        if self.workflows is None or env != self.workflows_env:
+            workflows = Workflows()
+            # the old pair stays in place when no watcher can be created
+            watcher = get_watcher(workflows.get_wf_directory())
+            if self.watcher:
+                self.watcher.close()
+            self.watcher = watcher
+            self.workflows = workflows
+            self.workflows_env = env
+            # the change detector only sees added or removed workflows,
+            # plists edited before the watcher started need a verification
+            self.workflows.refresh(changed=True)
+        else:
+            self.workflows.refresh(self.watcher.has_changed())
+        return self.workflows
+
+    def run_script(self, script: str, query: str, env: dict) -> bytes:
+        """Run script like Alfred would and capture its output
+
+        Args:
+            script (str): Script name
+            query (str): Alfred query
+            env (dict): Environment of the request
+
+        Returns:
+            bytes: Exit status, stdout and stderr of the script separated by NUL
+        """
+        try:
+            started = float(env.pop(STARTED_ENV_NAME))
+        except (KeyError, ValueError):
+            started = time.time()
+        os.environ.clear()
+        os.environ.update(env)
+        sys.argv = [script, query]
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        status = 0
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                if script == 'alf.py':
+                    profiler.run(script, lambda: alf.main(self.get_workflows()), started=started)
+                elif script == 'keywords.py':
+                    profiler.run(script, lambda: keywords.main(self.get_workflows()), started=started)
+                elif script == 'action.py':
+                    profiler.run(script, action.main, started=started)
+                elif script == 'stats.py':
+                    stats.main()
+                elif script == 'conflicts.py':
+                    conflicts.main(self.get_workflows())
+                else:
+                    sys.stderr.write(f"Error: unknown script {script}\n")
+                    status = 2
+            except SystemExit as e:
+                # same exit status as the interpreter would set
+                if e.code is None or isinstance(e.code, int):
+                    status = (e.code or 0) & 0xFF
+                else:
+                    sys.stderr.write(f"{e.code}\n")
+                    status = 1
+            except Exception:
+                traceback.print_exc()
+                status = 1
+        return SEPARATOR.join([
+            str(status).encode('ascii'),
+            stdout.getvalue().encode('utf-8', 'surrogateescape'),
+            stderr.getvalue().encode('utf-8', 'surrogateescape')
+        ])
+
+    def handle_timeout(self) -> None:
+        self.is_idle = True
+
+    def serve_until_idle(self) -> None:
+        """Handle requests until idle timeout or until the workflow code changed
+        """
+        while not self.is_idle:
+            self.handle_request()
+            if self.get_code_stamp() != self.code_stamp:
+                break
+
+
+class ScriptHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        fields = self.rfile.read().split(SEPARATOR)
+        if len(fields) < 2:
+            return
+        script, query = [f.decode('utf-8', 'surrogateescape') for f in fields[:2]]
+        env = dict()
+        for f in fields[2:]:
+            k, _, v = f.decode('utf-8', 'surrogateescape').partition('=')
+            env[k] = v
+        self.wfile.write(self.server.run_script(script, query, env))
+
+
+def main() -> None:
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    socket_path = get_socket_path()
+    data_dir = os.path.dirname(socket_path)
+    os.makedirs(data_dir, exist_ok=True)
+    try:
+        idle_timeout = int(os.getenv('server_idle_timeout', IDLE_TIMEOUT))
+    except ValueError:
+        idle_timeout = IDLE_TIMEOUT
+    with open(os.path.join(data_dir, LOCK_NAME), 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # another server is already running
+            return
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ScriptServer(socket_path, idle_timeout)
+        try:
+            server.serve_until_idle()
+        finally:
+            if server.watcher:
+                server.watcher.close()
+            server.server_close()
+            os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+import math
+
+from Alfred3 import Items, Tools
+from LatencyStore import LatencyStore
+
+# Latency budget of a keystroke in ms
+BUDGET_MS = 50
+PERCENTILES = [50, 95, 99]
+
+
+def percentile(values: list, p: int) -> float:
+    """Get percentile with the nearest rank method
+
+    Args:
+        values (list): Sorted values
+        p (int): Percentile 1..100
+
+    Returns:
+        float: Value at the percentile
+    """
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def main() -> None:
+    """List latency percentiles per entry point and cache state
+    """
+    query = Tools.getArgv(1).lower()
+    runs = LatencyStore(Tools.getDataDir()).read()
+    groups = dict()
+    for _, ms, script, state, _ in runs:
+        groups.setdefault((script, state), list()).append(ms)
+
+    alf = Items(compact=True)
+    for script in LatencyStore.SCRIPTS:
+        for state in LatencyStore.STATES:
+            values = sorted(groups.get((script, state), list()))
+            if not values or query not in script:
+                continue
+            p_text = '   '.join(f'p{p} {percentile(values, p):.1f} ms' for p in PERCENTILES)
+            in_budget = sum(1 for v in values if v <= BUDGET_MS) * 100 // len(values)
+            alf.setItem(
+                title=f'{script} ({state})',
+                subtitle=f'{p_text}   n={len(values)}, {in_budget}% within {BUDGET_MS} ms',
+                valid=False
+            )
+            alf.setIcon('icon.png', m_type='image')
+            alf.addItem()
+    if alf.getItemsLengths() == 0:
+        alf.setItem(
+            title='No runs recorded yet',
+            subtitle=f'Runs are recorded while Record Latency is turned on, the last {LatencyStore.SLOTS} are kept',
+            valid=False
+        )
+        alf.addItem()
+    alf.write()
+
+
+if __name__ == "__main__":
+    main()
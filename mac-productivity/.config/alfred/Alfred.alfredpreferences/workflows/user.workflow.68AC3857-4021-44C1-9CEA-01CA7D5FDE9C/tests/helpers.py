@@ -0,0 +1,63 @@
+import os
+import plistlib
+
+
+def write_workflow(wf_directory, dir_name, name, description='', keywords=(), hotkeys=(),
+                   disabled=False, user_config=(), prefs=None, icon=False):
+    """Write a workflow directory as Alfred does
+
+    Args:
+        wf_directory (str): Alfred workflows directory
+        dir_name (str): Name of the workflow directory
+        name (str): Workflow name
+        description (str, optional): Workflow description. Defaults to ''.
+        keywords (iterable, optional): Keywords of keyword inputs. Defaults to ().
+        hotkeys (iterable, optional): (hotmod, hotstring) of hotkey triggers. Defaults to ().
+        disabled (bool, optional): Workflow is disabled. Defaults to False.
+        user_config (iterable, optional): (variable, default) of userconfigurationconfig. Defaults to ().
+        prefs (dict, optional): Content of prefs.plist, none is written if None. Defaults to None.
+        icon (bool, optional): Write an icon.png. Defaults to False.
+
+    Returns:
+        str: Path to info.plist
+    """
+    wf_dir = os.path.join(wf_directory, dir_name)
+    os.makedirs(wf_dir, exist_ok=True)
+    objects = list()
+    uidata = dict()
+    for n, keyword in enumerate(keywords):
+        uid = f"{dir_name}-K{n}"
+        objects.append({
+            'config': {'keyword': keyword, 'title': f"{name} {n}", 'withspace': True, 'script': 'echo'},
+            'type': 'alfred.workflow.input.scriptfilter',
+            'uid': uid
+        })
+        uidata[uid] = {'xpos': 50.0, 'ypos': 50.0}
+    for n, (hotmod, hotstring) in enumerate(hotkeys):
+        uid = f"{dir_name}-H{n}"
+        objects.append({
+            'config': {'hotkey': 0, 'hotmod': hotmod, 'hotstring': hotstring},
+            'type': 'alfred.workflow.trigger.hotkey',
+            'uid': uid
+        })
+        uidata[uid] = {'note': f"hotkey {n}", 'xpos': 50.0, 'ypos': 50.0}
+    info = {
+        'name': name,
+        'description': description,
+        'disabled': disabled,
+        'objects': objects,
+        'uidata': uidata,
+        'userconfigurationconfig': [
+            {'variable': variable, 'config': {'default': default}} for variable, default in user_config
+        ]
+    }
+    plist_path = os.path.join(wf_dir, 'info.plist')
+    with open(plist_path, 'wb') as fp:
+        plistlib.dump(info, fp)
+    if prefs is not None:
+        with open(os.path.join(wf_dir, 'prefs.plist'), 'wb') as fp:
+            plistlib.dump(prefs, fp)
+    if icon:
+        with open(os.path.join(wf_dir, 'icon.png'), 'wb') as fp:
+            fp.write(b'\x89PNG\r\n')
+    return plist_path
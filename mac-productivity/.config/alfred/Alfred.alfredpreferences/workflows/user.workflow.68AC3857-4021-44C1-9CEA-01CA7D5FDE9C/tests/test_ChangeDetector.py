@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import ChangeDetector as ChangeDetector_module
+from ChangeDetector import ChangeDetector, KqueueWatcher, PollingWatcher, get_watcher
+from tests.helpers import write_workflow
+
+
+def touch(path, seconds=1):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 1000000000))
+
+
+def test_fingerprint_is_a_single_stat(tmp_path, monkeypatch):
+    wf_directory = str(tmp_path / 'workflows')
+    for n in range(5):
+        write_workflow(wf_directory, f"wf{n}", f"Workflow {n}")
+    calls = list()
+    stat = os.stat
+    monkeypatch.setattr(os, 'stat', lambda p, *args, **kwargs: calls.append(p) or stat(p, *args, **kwargs))
+    assert ChangeDetector.fingerprint(wf_directory) is not None
+    assert calls == [wf_directory]
+
+
+def test_detects_added_and_removed_workflows(tmp_path):
+    wf_directory = str(tmp_path / 'workflows')
+    write_workflow(wf_directory, 'a', 'A')
+    detector = ChangeDetector(str(tmp_path))
+    detector.mark_verified(wf_directory, 'g1', ChangeDetector.fingerprint(wf_directory))
+    assert ChangeDetector(str(tmp_path)).is_unchanged(wf_directory, 'g1')
+    assert not detector.is_unchanged(wf_directory, 'g2')
+    write_workflow(wf_directory, 'b', 'B')
+    assert not detector.is_unchanged(wf_directory, 'g1')
+    detector.mark_verified(wf_directory, 'g1', ChangeDetector.fingerprint(wf_directory))
+    os.rename(os.path.join(wf_directory, 'b'), str(tmp_path / 'b'))
+    assert not detector.is_unchanged(wf_directory, 'g1')
+    assert not detector.is_unchanged(str(tmp_path / 'missing'), 'g1')
+
+
+def test_in_place_edits_keep_directory_fingerprint(tmp_path):
+    wf_directory = str(tmp_path / 'workflows')
+    plist_path = write_workflow(wf_directory, 'a', 'A')
+    detector = ChangeDetector('')
+    detector.mark_verified(wf_directory, 'g1', ChangeDetector.fingerprint(wf_directory))
+    touch(plist_path)
+    # only a verification or a watcher notices the edit
+    assert detector.is_unchanged(wf_directory, 'g1')
+
+
+def test_polling_watcher_detects_in_place_edits(tmp_path):
+    wf_directory = str(tmp_path / 'workflows')
+    plist_path = write_workflow(wf_directory, 'a', 'A')
+    watcher = PollingWatcher(wf_directory)
+    assert not watcher.has_changed()
+    touch(plist_path)
+    assert watcher.has_changed()
+    assert not watcher.has_changed()
+    with open(os.path.join(os.path.dirname(plist_path), 'prefs.plist'), 'wb') as fp:
+        fp.write(b'')
+    assert watcher.has_changed()
+    write_workflow(wf_directory, 'b', 'B')
+    assert watcher.has_changed()
+    assert not watcher.has_changed()
+
+
+def test_get_watcher_falls_back_to_polling(tmp_path, monkeypatch):
+    def fail(wf_directory):
+        raise ValueError('setrlimit: invalid argument')
+    monkeypatch.setattr(ChangeDetector_module, 'KqueueWatcher', fail)
+    watcher = get_watcher(str(tmp_path))
+    assert isinstance(watcher, PollingWatcher)
+
+
+def test_file_limit_error_is_an_os_error(monkeypatch):
+    resource = pytest.importorskip('resource')
+    monkeypatch.setattr(resource, 'getrlimit', lambda r: (256, resource.RLIM_INFINITY))
+
+    def setrlimit(r, limits):
+        raise ValueError('current limit exceeds maximum limit')
+    monkeypatch.setattr(resource, 'setrlimit', setrlimit)
+    with pytest.raises(OSError):
+        KqueueWatcher._raise_file_limit(None, 1000)
@@ -0,0 +1,69 @@
+import pytest
+
+from Hotkey import Hotkey
+
+SHIFT = Hotkey.SHIFT
+CONTROL = Hotkey.CONTROL
+COMMAND = Hotkey.COMMAND
+OPTION = Hotkey.OPTION
+FN = Hotkey.FN
+
+# hotmod table used by Workflows.get_item before hotmod was decoded bit by bit
+HOTMOD = {
+    131072: SHIFT,
+    262144: CONTROL,
+    262401: CONTROL,
+    393216: SHIFT + CONTROL,
+    524288: OPTION,
+    655360: SHIFT + OPTION,
+    786432: CONTROL + OPTION,
+    917504: SHIFT + CONTROL + OPTION,
+    1048576: COMMAND,
+    1179648: SHIFT + COMMAND,
+    1310720: CONTROL + COMMAND,
+    1310985: CONTROL + COMMAND,
+    1441792: SHIFT + CONTROL + COMMAND,
+    1572864: OPTION + COMMAND,
+    1703936: SHIFT + OPTION + COMMAND,
+    1835008: CONTROL + OPTION + COMMAND,
+    1966080: SHIFT + CONTROL + OPTION + COMMAND,
+    8388608: FN,
+    8519680: SHIFT,
+    11272192: CONTROL + OPTION
+}
+NAMES = {SHIFT: 'shift', CONTROL: 'ctrl', OPTION: 'opt', COMMAND: 'cmd', FN: 'fn'}
+
+
+@pytest.mark.parametrize('hotmod, symbols', HOTMOD.items())
+def test_decode(hotmod, symbols):
+    assert Hotkey.decode(hotmod) == symbols
+
+
+@pytest.mark.parametrize('hotmod, symbols', HOTMOD.items())
+def test_parse_display(hotmod, symbols):
+    mask = Hotkey.get_mask(hotmod)
+    assert Hotkey.parse_display(f'{symbols} K') == (mask, 'k')
+    assert Hotkey.parse_display(f'{symbols} F5') == (mask, 'f5')
+    assert Hotkey.decode(mask) == symbols
+
+
+@pytest.mark.parametrize('hotmod, symbols', HOTMOD.items())
+def test_parse(hotmod, symbols):
+    mask = Hotkey.get_mask(hotmod)
+    names = [NAMES[s] for s in ([FN] if symbols == FN else symbols)]
+    assert Hotkey.parse(f'{symbols}+K') == (mask, 'k')
+    if symbols != FN:
+        assert Hotkey.parse(f'{symbols}K') == (mask, 'k')
+    assert Hotkey.parse(symbols) == (mask, '')
+    assert Hotkey.parse('+'.join(names + ['K'])) == (mask, 'k')
+    assert Hotkey.parse('+'.join(reversed(names))) == (mask, '')
+
+
+@pytest.mark.parametrize('hotmod', [0, None, 'x', 1 << 21, 256])
+def test_without_modifiers(hotmod):
+    assert Hotkey.decode(hotmod) == ''
+
+
+def test_parse_display_invalid():
+    assert Hotkey.parse_display(None) is None
+    assert Hotkey.parse_display(' k') == (0, 'k')
@@ -0,0 +1,109 @@
+import datetime
+import glob
+import io
+import os
+import plistlib
+
+import pytest
+
+from PlistExtractor import PlistExtractor
+from Workflows import Workflows
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'info.plist')
+# info.plist and prefs.plist of the workflows next to this one
+WORKFLOW_PLISTS = sorted(
+    glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '*', '*.plist')))
+
+
+def get_id(path):
+    return os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+
+
+def project(value, schema):
+    """Reduce a plistlib result to the part selected by schema"""
+    if schema is True:
+        return value
+    if isinstance(value, dict) and isinstance(schema, dict):
+        return {
+            k: project(v, schema.get(k, schema.get('*')))
+            for k, v in value.items() if k in schema or '*' in schema
+        }
+    if isinstance(value, list) and isinstance(schema, list):
+        return [project(v, schema[0]) for v in value]
+    return value
+
+
+def load(data, schema=True):
+    return PlistExtractor(schema).load(io.BytesIO(data))
+
+
+def read(path):
+    with open(path, 'rb') as fp:
+        return fp.read()
+
+
+@pytest.mark.parametrize('path', [FIXTURE] + WORKFLOW_PLISTS, ids=get_id)
+def test_parity_with_plistlib(path):
+    data = read(path)
+    assert load(data) == plistlib.loads(data)
+
+
+@pytest.mark.parametrize('path', [FIXTURE] + WORKFLOW_PLISTS, ids=get_id)
+def test_schema_selects_part_of_plistlib_result(path):
+    data = read(path)
+    expected = project(plistlib.loads(data), Workflows.PLIST_SCHEMA)
+    assert load(data, Workflows.PLIST_SCHEMA) == expected
+
+
+def test_fixture_values():
+    info = load(read(FIXTURE))
+    assert info['description'] == 'Tom & Jerry <b> "quoted" \'single\' ☺ ☃'
+    assert info['createdon'] == datetime.datetime(2023, 4, 5, 6, 7, 8)
+    assert info['icondata'].startswith(b'\x89PNG')
+    assert info['matrix'] == [[1, -2, 31], [0.5, -1000.0, []], [{}, '', '']]
+    assert info['objects'][0]['config']['script'] == 'echo "$1" && exit 0\n# second line\r\n\tindented'
+
+
+def test_schema_skips_unselected_values():
+    info = load(read(FIXTURE), Workflows.PLIST_SCHEMA)
+    assert sorted(info) == ['description', 'disabled', 'name', 'objects', 'uidata', 'userconfigurationconfig']
+    assert info['uidata']['11111111-2222-3333-4444-555555555555'] == {'note': 'first & only'}
+    assert info['objects'][0]['config'] == {
+        'keyword': '{var:fixture_keyword}', 'title': 'Fixture Keyword', 'withspace': True
+    }
+    assert info['userconfigurationconfig'] == [{'config': {'default': 'fx'}, 'variable': 'fixture_keyword'}]
+
+
+def test_generated_values():
+    value = {
+        'bytes': b'\x00\x01binary\xff' * 20,
+        'date': datetime.datetime(1999, 12, 31, 23, 59, 59),
+        'nested': [[[1, 2], []], [{'a': [True, False]}]],
+        'numbers': [0, -1, 2 ** 40, 1.25],
+        'text': 'a < b & c > d é⌘',
+        'empty': ''
+    }
+    data = plistlib.dumps(value)
+    assert load(data) == plistlib.loads(data) == value
+
+
+def test_binary_plist():
+    value = {'name': 'Binary', 'objects': [{'type': 't', 'uid': 'u', 'config': {}}]}
+    assert load(plistlib.dumps(value, fmt=plistlib.FMT_BINARY), Workflows.PLIST_SCHEMA) == value
+
+
+def test_entity_declarations_are_rejected():
+    data = b'''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE plist [<!ENTITY e "expanded">]>
+<plist version="1.0"><dict><key>name</key><string>&e;</string></dict></plist>'''
+    with pytest.raises(Exception):
+        plistlib.loads(data)
+    with pytest.raises(ValueError):
+        load(data)
+
+
+def test_invalid_xml():
+    with pytest.raises(ValueError):
+        load(b'<plist><dict><key>name</key><string>x</dict></plist>')
+    with pytest.raises(ValueError):
+        load(b'<plist><array/></plist>')
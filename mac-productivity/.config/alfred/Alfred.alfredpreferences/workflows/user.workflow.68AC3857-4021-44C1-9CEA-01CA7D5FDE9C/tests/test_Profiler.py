@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from LatencyStore import LatencyStore
+from Profiler import Profiler
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('alfred_workflow_data', str(tmp_path))
+    monkeypatch.delenv('alf_profile', raising=False)
+    monkeypatch.delenv('alf_cprofile', raising=False)
+    monkeypatch.delenv('latency_log', raising=False)
+    return str(tmp_path)
+
+
+def annotate_warm(profiler):
+    profiler.annotate(cache='warm', results=3)
+
+
+def test_runs_are_recorded_by_default(data_dir):
+    profiler = Profiler()
+    profiler.run('alf.py', annotate_warm, profiler)
+    profiler.run('action.py', lambda: None)
+    runs = LatencyStore(data_dir).read()
+    assert [(script, state, results) for _, _, script, state, results in runs] == [
+        ('alf.py', 'warm', 3), ('action.py', 'none', 0)
+    ]
+
+
+@pytest.mark.parametrize('value', ['0', 'false'])
+def test_latency_log_turned_off(data_dir, monkeypatch, value):
+    monkeypatch.setenv('latency_log', value)
+    Profiler().run('alf.py', lambda: None)
+    assert LatencyStore(data_dir).read() == []
+
+
+def test_profiled_runs_are_recorded(data_dir, monkeypatch, capsys):
+    monkeypatch.setenv('latency_log', '0')
+    monkeypatch.setenv('alf_profile', '1')
+    Profiler().run('keywords.py', lambda: None)
+    assert len(LatencyStore(data_dir).read()) == 1
+    assert '"script":"keywords.py"' in capsys.readouterr().err
+
+
+def test_process_start(monkeypatch):
+    monkeypatch.setattr(time, 'time', lambda: 1000.0)
+    monkeypatch.setattr(time, 'process_time', lambda: 0.25)
+    assert Profiler.get_process_start() == 999.75
+
+
+def test_run_time_counts_from_start(data_dir):
+    profiler = Profiler()
+    profiler.run('alf.py', lambda: None, started=time.time() - 0.2)
+    (_, ms, _, _, _), = LatencyStore(data_dir).read()
+    assert 200 <= ms < 2000
+
+
+def test_run_time_counts_from_process_start(data_dir, monkeypatch):
+    monkeypatch.setattr(Profiler, 'get_process_start', staticmethod(lambda: time.time() - 0.1))
+    Profiler().run('alf.py', lambda: None)
+    (_, ms, _, _, _), = LatencyStore(data_dir).read()
+    assert 100 <= ms < 2000
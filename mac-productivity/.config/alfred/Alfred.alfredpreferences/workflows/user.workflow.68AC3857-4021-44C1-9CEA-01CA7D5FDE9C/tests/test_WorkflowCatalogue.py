@@ -0,0 +1,174 @@
+import os
+import random
+
+import pytest
+
+from Hotkey import Hotkey
+from WorkflowCatalogue import WorkflowCatalogue
+from WorkflowIndex import WorkflowIndex
+from Workflows import Workflows
+from tests.helpers import write_workflow
+
+CMD = 1 << 20
+OPT = 1 << 19
+SHIFT = 1 << 17
+PREFIXES = ['a', 'al', 'disk', 'c++', ' ', '-', 'é', 'über', 'zz', 'k', 'note', 'x' * 30]
+
+
+@pytest.fixture
+def workflows(tmp_path, monkeypatch):
+    """Workflows of a fixture preferences tree with a persistent cache"""
+    wf_directory = str(tmp_path / 'prefs' / 'workflows')
+    write_workflow(wf_directory, 'a', 'Alpha', 'Disk usage', keywords=['al', 'alpha'], hotkeys=[(CMD, 'K')])
+    write_workflow(wf_directory, 'b', 'alpha', 'lower case twin', keywords=['al'], hotkeys=[(CMD, 'k')])
+    write_workflow(wf_directory, 'c', 'C++ Tools', 'Build c++ projects', keywords=['cpp'], icon=True)
+    write_workflow(wf_directory, 'd', 'Über Notes', 'Notes with umlauts é', keywords=['{var:kw}'],
+                   user_config=[('kw', 'note')], prefs={'kw': 'notes'}, hotkeys=[(CMD | OPT, 'N'), (0, 'F5')])
+    write_workflow(wf_directory, 'e', 'Écrire', 'Write', keywords=['ecr'], hotkeys=[(1 << 23, 'F1')])
+    write_workflow(wf_directory, 'f', 'Disabled', 'Disk tool', keywords=['dis'], disabled=True,
+                   hotkeys=[(CMD, 'K')])
+    write_workflow(wf_directory, 'g', 'Long ' + 'x' * 40, '', keywords=['long'])
+    os.makedirs(os.path.join(wf_directory, 'no-plist'))
+    monkeypatch.setenv('alfred_preferences', str(tmp_path / 'prefs'))
+    monkeypatch.setenv('alfred_workflow_cache', str(tmp_path / 'cache'))
+    monkeypatch.setenv('exclude_disabled', '0')
+    monkeypatch.delenv('ingest_backend', raising=False)
+    wf = Workflows()
+    wf.get_workflows()
+    return wf
+
+
+def get_paths(catalogue, wf_ids):
+    return {catalogue.get_path(i) for i in wf_ids}
+
+
+def test_items_match_index(workflows):
+    catalogue = workflows.catalogue
+    index = workflows.index
+    items = {p: e['item'] for p, e in index.entries.items() if e['item']}
+    assert len(catalogue) == len(items) == 7
+    for wf_id in range(len(catalogue)):
+        item = catalogue.get_item(wf_id)
+        assert item == items[item['path']]
+
+
+def test_name_order(workflows):
+    names = [wf['name'] for wf in workflows.get_workflows()]
+    # equal collation keys keep code point order
+    assert names == ['Alpha', 'alpha', 'C++ Tools', 'Disabled', 'Écrire', 'Long ' + 'x' * 40, 'Über Notes']
+    assert [wf['name'] for wf in workflows.get_workflows(reverse=True)] == names[::-1]
+    assert [wf['name'] for wf in workflows.get_workflows()[2:4]] == names[2:4]
+
+
+@pytest.mark.parametrize('prefix', PREFIXES)
+def test_find_matches_index_tokens(workflows, prefix):
+    catalogue = workflows.catalogue
+    prefix = prefix[:WorkflowIndex.MAX_TOKEN_LENGTH]
+    expected = {
+        p for p, tokens in workflows.index.get_tokens_by_path().items()
+        if any(t.startswith(prefix) for t in tokens)
+    }
+    assert get_paths(catalogue, catalogue.find(prefix)) == expected
+
+
+def test_find_path(workflows):
+    catalogue = workflows.catalogue
+    for plist_path, entry in workflows.index.entries.items():
+        wf_id = catalogue.find_path(plist_path)
+        assert catalogue.get_path(wf_id) == plist_path
+        assert catalogue.get_item(wf_id) == entry['item']
+    assert catalogue.find_path('/missing/info.plist') is None
+    assert catalogue.find_path('') is None
+
+
+def test_find_hotkey(workflows):
+    catalogue = workflows.catalogue
+    owners = dict()
+    for wf in workflows.get_workflows():
+        for k in wf['keyb']:
+            owners.setdefault(Hotkey.parse_display(k['keyb']), set()).add(wf['path'])
+    assert owners[(CMD, 'k')] == {
+        os.path.join(workflows.get_wf_directory(), d, 'info.plist') for d in ('a', 'b', 'f')
+    }
+    for (mask, key), paths in owners.items():
+        assert get_paths(catalogue, catalogue.find_hotkey(mask, key)) == paths
+    assert catalogue.find_hotkey(CMD, 'z') == set()
+    assert catalogue.find_hotkey(SHIFT, 'k') == set()
+
+
+def test_open_reads_written_file(workflows):
+    catalogue = WorkflowCatalogue.open(workflows._get_catalogue_path())
+    try:
+        assert catalogue.generation == workflows.catalogue.generation
+        assert catalogue.get_items() == workflows.catalogue.get_items()
+    finally:
+        catalogue.close()
+
+
+def test_version_mismatch_rebuilds(workflows, monkeypatch):
+    path = workflows._get_catalogue_path()
+    items = workflows.catalogue.get_items()
+    with open(path, 'r+b') as fp:
+        fp.seek(4)
+        fp.write((WorkflowCatalogue.VERSION - 1).to_bytes(2, 'little'))
+    assert WorkflowCatalogue.open(path) is None
+    wf = Workflows()
+    assert wf.catalogue is None
+    assert wf.get_workflows().catalogue.get_items() == items
+    catalogue = WorkflowCatalogue.open(path)
+    assert catalogue is not None
+    catalogue.close()
+
+
+def test_invalid_buffers():
+    with pytest.raises(ValueError):
+        WorkflowCatalogue(b'ALFC')
+    data = WorkflowCatalogue.build([], {}, '0' * 32, False)
+    assert len(WorkflowCatalogue(data)) == 0
+    with pytest.raises(ValueError):
+        WorkflowCatalogue(b'XXXX' + data[4:])
+
+
+def build_hotkey_catalogue(count, seed=0):
+    """Catalogue with many workflows sharing few hotkeys"""
+    rnd = random.Random(seed)
+    workflows = list()
+    for n in range(count):
+        keyb = list()
+        for _ in range(rnd.randint(0, 3)):
+            mask = rnd.choice([0, CMD, CMD | OPT, SHIFT | CMD, 1 << 23])
+            key = rnd.choice('abc')
+            keyb.append({'keyb': f'{Hotkey.decode(mask)} {key}', 'note': None})
+        workflows.append({'name': f'wf {n}', 'path': f'/wf/{n:05d}/info.plist', 'keywords': [], 'keyb': keyb})
+    return workflows, WorkflowCatalogue(WorkflowCatalogue.build(workflows, {}, '0' * 32, False))
+
+
+def check_hotkeys(workflows, catalogue):
+    owners = dict()
+    for wf in workflows:
+        for k in wf['keyb']:
+            owners.setdefault(Hotkey.parse_display(k['keyb']), set()).add(wf['path'])
+    pairs = sum(len(p) for p in owners.values())
+    # the hash table stays at most half full, probing ends at an empty slot
+    assert catalogue.slot_count >= 2 * pairs
+    assert catalogue.slot_count & (catalogue.slot_count - 1) == 0
+    for (mask, key), paths in owners.items():
+        assert get_paths(catalogue, catalogue.find_hotkey(mask, key)) == paths
+    for key in 'abcd':
+        assert catalogue.find_hotkey(SHIFT, key) == set()
+
+
+def test_hotkey_collisions():
+    check_hotkeys(*build_hotkey_catalogue(2000))
+
+
+def test_hotkeys_in_one_probe_sequence(monkeypatch):
+    # every hotkey hashes to the same slot, lookups probe through all of them
+    monkeypatch.setattr(WorkflowCatalogue, '_get_slot', staticmethod(lambda mask, key, slot_count: 0))
+    check_hotkeys(*build_hotkey_catalogue(300, seed=1))
+
+
+def test_without_hotkeys():
+    workflows, catalogue = build_hotkey_catalogue(0)
+    assert catalogue.slot_count == 0
+    assert catalogue.find_hotkey(CMD, 'a') == set()
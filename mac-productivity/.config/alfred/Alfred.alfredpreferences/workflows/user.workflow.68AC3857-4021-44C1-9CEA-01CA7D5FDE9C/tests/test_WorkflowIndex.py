@@ -0,0 +1,173 @@
+import json
+import os
+
+import pytest
+
+from WorkflowCatalogue import WorkflowCatalogue
+from WorkflowIndex import WorkflowIndex
+from Workflows import Workflows
+from tests.helpers import write_workflow
+
+
+def build_index(tmp_path):
+    wf_directory = tmp_path / 'workflows'
+    write_workflow(str(wf_directory), 'a', 'Alpha', icon=True)
+    write_workflow(str(wf_directory), 'b', 'Beta', prefs={'keyword': 'bb'})
+    os.makedirs(wf_directory / 'empty')
+    stamps = WorkflowIndex.scan(str(wf_directory))
+    index = WorkflowIndex(str(tmp_path / 'cache'), True)
+    for plist_path in stamps:
+        index.put(plist_path, stamps[plist_path], {'name': plist_path}, [f'Name of {plist_path}'])
+    index.save()
+    return str(wf_directory), stamps, index
+
+
+def test_scan_stamps(tmp_path):
+    wf_directory, stamps, _ = build_index(tmp_path)
+    a = os.path.join(wf_directory, 'a', 'info.plist')
+    b = os.path.join(wf_directory, 'b', 'info.plist')
+    # directories without info.plist are no workflows
+    assert sorted(stamps) == [a, b]
+    st = os.stat(a)
+    assert stamps[a] == [st.st_mtime_ns, st.st_size, None, None, True]
+    prefs_st = os.stat(os.path.join(wf_directory, 'b', 'prefs.plist'))
+    assert stamps[b][2:] == [prefs_st.st_mtime_ns, prefs_st.st_size, False]
+
+
+def test_save_load_round_trip(tmp_path):
+    _, stamps, index = build_index(tmp_path)
+    assert not index.changed
+    loaded = WorkflowIndex(str(tmp_path / 'cache'), True)
+    assert loaded.entries == index.entries
+    assert loaded.get_generation() == index.get_generation()
+    for plist_path, stamp in stamps.items():
+        assert loaded.get(plist_path, stamp) == (True, {'name': plist_path})
+    assert loaded.get_tokens_by_path() == index.get_tokens_by_path()
+    # nothing changed, nothing is written
+    assert not loaded.changed
+    # the index is replaced atomically, no temporary file is left behind
+    assert os.listdir(tmp_path / 'cache') == [WorkflowIndex.FILE_NAME]
+
+
+def test_mtime_change_invalidates_entry(tmp_path):
+    wf_directory, stamps, _ = build_index(tmp_path)
+    a = os.path.join(wf_directory, 'a', 'info.plist')
+    b = os.path.join(wf_directory, 'b', 'info.plist')
+    st = os.stat(a)
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+    prefs = os.path.join(wf_directory, 'b', 'prefs.plist')
+    st = os.stat(prefs)
+    os.utime(prefs, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+    new_stamps = WorkflowIndex.scan(wf_directory)
+    index = WorkflowIndex(str(tmp_path / 'cache'), True)
+    assert index.get(a, new_stamps[a]) == (False, None)
+    assert index.get(b, new_stamps[b]) == (False, None)
+    assert index.get(a, stamps[a]) == (True, {'name': a})
+
+
+def test_version_change_invalidates_index(tmp_path, monkeypatch):
+    build_index(tmp_path)
+    monkeypatch.setattr(WorkflowIndex, 'VERSION', WorkflowIndex.VERSION + 1)
+    index = WorkflowIndex(str(tmp_path / 'cache'), True)
+    assert index.entries == {}
+    # the outdated file is replaced on the next save
+    assert index.changed
+    index.save()
+    with open(tmp_path / 'cache' / WorkflowIndex.FILE_NAME, encoding='utf-8') as fp:
+        assert json.load(fp)['version'] == WorkflowIndex.VERSION
+
+
+def test_exclude_disabled_change_invalidates_index(tmp_path):
+    build_index(tmp_path)
+    assert WorkflowIndex(str(tmp_path / 'cache'), False).entries == {}
+
+
+def test_corrupt_index_is_ignored(tmp_path):
+    os.makedirs(tmp_path / 'cache')
+    with open(tmp_path / 'cache' / WorkflowIndex.FILE_NAME, 'w', encoding='utf-8') as fp:
+        fp.write('{"version": ')
+    assert WorkflowIndex(str(tmp_path / 'cache'), True).entries == {}
+
+
+@pytest.mark.parametrize('entry', [
+    'garbage',
+    {'stamp': 'garbage', 'item': {'name': 'x'}, 'tokens': []},
+    {'stamp': None, 'item': {'name': 'x'}, 'tokens': []},
+    {'stamp': 'STAMP', 'item': 'garbage', 'tokens': []},
+    {'stamp': 'STAMP', 'item': ['garbage'], 'tokens': []},
+    {'stamp': 'STAMP', 'item': {'name': 'x'}, 'tokens': 'garbage'},
+    {'stamp': 'STAMP', 'item': {'name': 'x'}, 'tokens': [1]},
+])
+def test_malformed_entry_is_stale(tmp_path, entry):
+    _, stamps, _ = build_index(tmp_path)
+    a = sorted(stamps)[0]
+    if isinstance(entry, dict) and entry['stamp'] == 'STAMP':
+        entry['stamp'] = stamps[a]
+    index_path = tmp_path / 'cache' / WorkflowIndex.FILE_NAME
+    with open(index_path, encoding='utf-8') as fp:
+        data = json.load(fp)
+    data['entries'][a] = entry
+    with open(index_path, 'w', encoding='utf-8') as fp:
+        json.dump(data, fp)
+    assert WorkflowIndex(str(tmp_path / 'cache'), True).get(a, stamps[a]) == (False, None)
+
+
+def test_malformed_item_is_parsed_again(tmp_path, monkeypatch):
+    wf_directory = str(tmp_path / 'prefs' / 'workflows')
+    write_workflow(wf_directory, 'a', 'Alpha')
+    write_workflow(wf_directory, 'b', 'Beta')
+    monkeypatch.setenv('alfred_preferences', str(tmp_path / 'prefs'))
+    monkeypatch.setenv('alfred_workflow_cache', str(tmp_path / 'cache'))
+    monkeypatch.setenv('exclude_disabled', '0')
+    assert [wf['name'] for wf in Workflows().get_workflows()] == ['Alpha', 'Beta']
+    index_path = tmp_path / 'cache' / WorkflowIndex.FILE_NAME
+    with open(index_path, encoding='utf-8') as fp:
+        data = json.load(fp)
+    for entry in data['entries'].values():
+        entry['item'] = 'garbage'
+    with open(index_path, 'w', encoding='utf-8') as fp:
+        json.dump(data, fp)
+    # no catalogue to fall back to, the index is all there is
+    os.remove(tmp_path / 'cache' / WorkflowCatalogue.FILE_NAME)
+    assert [wf['name'] for wf in Workflows().get_workflows()] == ['Alpha', 'Beta']
+
+
+def test_prune_removes_uninstalled_workflows(tmp_path):
+    _, stamps, index = build_index(tmp_path)
+    generation = index.get_generation()
+    kept = sorted(stamps)[0]
+    index.prune([kept])
+    assert list(index.entries) == [kept]
+    assert index.changed
+    assert index.get_generation() != generation
+
+
+def test_tokens_start_at_word_boundaries():
+    # word ends are boundaries as well
+    assert WorkflowIndex.get_tokens(['Disk Usage']) == [' usage', 'disk usage', 'usage']
+
+
+def test_tokens_of_punctuation():
+    assert WorkflowIndex.get_tokens(['C++ (beta)']) == [
+        ')', '++ (beta)', 'beta)', 'c++ (beta)'
+    ]
+    assert WorkflowIndex.get_tokens(['re-index.py']) == [
+        '-index.py', '.py', 'index.py', 'py', 're-index.py'
+    ]
+
+
+def test_tokens_of_unicode():
+    assert WorkflowIndex.get_tokens(['Café Übersicht']) == [' übersicht', 'café übersicht', 'übersicht']
+    assert WorkflowIndex.get_tokens(['日本語 テスト']) == [' テスト', 'テスト', '日本語 テスト']
+
+
+def test_tokens_are_truncated():
+    name = 'Supercalifragilisticexpialidocious Tool'
+    tokens = WorkflowIndex.get_tokens([name])
+    assert tokens == [' tool', name[:WorkflowIndex.MAX_TOKEN_LENGTH].lower(), 'tool']
+    assert all(len(t) <= WorkflowIndex.MAX_TOKEN_LENGTH for t in tokens)
+
+
+def test_tokens_are_unique_and_sorted():
+    assert WorkflowIndex.get_tokens(['Git', 'git', 'Github']) == ['git', 'github']
+    assert WorkflowIndex.get_tokens([]) == []
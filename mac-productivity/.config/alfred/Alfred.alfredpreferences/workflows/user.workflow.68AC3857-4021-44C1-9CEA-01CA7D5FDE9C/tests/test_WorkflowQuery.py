@@ -0,0 +1,175 @@
+import pytest
+
+from WorkflowQuery import WorkflowQuery
+from Workflows import Workflows
+from tests.helpers import write_workflow
+
+CMD = 1 << 20
+OPT = 1 << 19
+
+DISK_USAGE = 'Disk Usage'
+CPP_TOOLS = 'C++ Tools (beta)'
+# inputs which crashed the regular expression based search,
+# with the results of search_in_workflows and rank_workflows
+SPECIAL_QUERIES = [
+    ('(', [CPP_TOOLS]),
+    ('(beta', [CPP_TOOLS]),
+    ('(beta -disk', [CPP_TOOLS]),
+    ('(c++', []),
+    ('+', [CPP_TOOLS]),
+    ('++', [CPP_TOOLS]),
+    ('a(', []),
+    ('c++', [CPP_TOOLS]),
+    ('[', []),
+    ('*', []),
+    ('\\', []),
+    ('?', []),
+    ('-', []),
+    ('kw:', []),
+    ('"', [CPP_TOOLS, DISK_USAGE]),
+    ('"disk us', [DISK_USAGE])
+]
+
+
+def workflow(name, description='', keywords=(), hotkeys=(), disabled=False):
+    return {
+        'name': name,
+        'description': description,
+        'keywords': [{'keyword': k, 'title': None, 'text': None} for k in keywords],
+        'keyb': [{'keyb': h, 'note': None} for h in hotkeys],
+        'disabled': disabled
+    }
+
+
+DISK = workflow('Disk Usage', 'See disk usage', keywords=['du'], hotkeys=['⌘⌥ D'])
+CPP = workflow('C++ Tools (beta)', 'Build c++ projects', keywords=['cpp'], hotkeys=['⌘ K'])
+OFF = workflow('Disabled Notes', 'Notes', keywords=['notes'], disabled=True)
+ALL = [DISK, CPP, OFF]
+
+
+def get_strings(wf):
+    return [wf['name'], wf['description']] + [k['keyword'] for k in wf['keywords']]
+
+
+def search(query):
+    predicate = WorkflowQuery(query).compile(get_strings)
+    return [wf for wf in ALL if predicate(wf)]
+
+
+@pytest.mark.parametrize('query, terms, is_plain', [
+    ('disk', [(None, 'disk', False)], True),
+    ('disk usage', [(None, 'disk', False), (None, 'usage', False)], True),
+    ('"disk usage"', [(None, 'disk usage', False)], False),
+    ('-disk', [(None, 'disk', True)], False),
+    ('name:disk', [('name', 'disk', False)], False),
+    ('NAME:Disk', [('name', 'Disk', False)], False),
+    ('desc:"c++ projects"', [('desc', 'c++ projects', False)], False),
+    ('kw:du hk:cmd+opt+d', [('kw', 'du', False), ('hk', 'cmd+opt+d', False)], False),
+    ('-disabled:true', [('disabled', 'true', True)], False),
+    ('unknown:field', [(None, 'unknown:field', False)], True),
+])
+def test_terms(query, terms, is_plain):
+    q = WorkflowQuery(query)
+    assert q.terms == terms
+    assert q.is_plain == is_plain
+
+
+@pytest.mark.parametrize('query, terms', [
+    ('(', [(None, '(', False)]),
+    ('+', [(None, '+', False)]),
+    ('a(', [(None, 'a(', False)]),
+    ('c++', [(None, 'c++', False)]),
+    # a field without value is a word
+    ('kw:', [(None, 'kw:', False)]),
+    ('hk:', [(None, 'hk:', False)]),
+    # a dash without term is a word as well
+    ('-', [(None, '-', False)]),
+    ('- a', [(None, '-', False), (None, 'a', False)]),
+    ('', []),
+    ('   ', []),
+])
+def test_special_characters_are_plain_words(query, terms):
+    q = WorkflowQuery(query)
+    assert q.terms == terms
+    assert q.is_plain
+
+
+@pytest.mark.parametrize('query, terms', [
+    ('"disk us', [(None, 'disk us', False)]),
+    ('name:"disk', [('name', 'disk', False)]),
+    ('"', [(None, '', False)]),
+    ('a "b', [(None, 'a', False), (None, 'b', False)]),
+    ('kw:""', [('kw', '', False)]),
+])
+def test_unterminated_and_empty_quotes(query, terms):
+    q = WorkflowQuery(query)
+    assert q.terms == terms
+    assert not q.is_plain
+
+
+def test_prefixes():
+    q = WorkflowQuery('Disk "Usage Stats" -beta name:x c++')
+    assert q.get_prefixes() == ['disk', 'usage stats', 'c++']
+    assert WorkflowQuery('""').get_prefixes() == []
+    # no token starts with punctuation
+    assert WorkflowQuery('(beta +x a( -b').get_prefixes() == ['a(']
+
+
+def test_hotkeys():
+    assert WorkflowQuery('hk:⌘⌥D hk:cmd -hk:cmd+k').get_hotkeys() == [(CMD | OPT, 'd')]
+    assert WorkflowQuery('hk:opt+cmd+D').get_hotkeys() == [(CMD | OPT, 'd')]
+    assert WorkflowQuery('hk:cmd').get_hotkeys() == []
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('disk', [DISK]),
+    ('"disk usage"', [DISK]),
+    ('"usage disk"', []),
+    ('-disk', [CPP, OFF]),
+    ('name:disk', [DISK]),
+    ('desc:"c++ proj"', [CPP]),
+    ('desc:usage', [DISK]),
+    ('kw:d', [DISK]),
+    ('-kw:d', [CPP, OFF]),
+    ('kw:""', [DISK, CPP, OFF]),
+    ('hk:cmd', [DISK, CPP]),
+    ('hk:⌘⌥', [DISK]),
+    ('hk:cmd+k', [CPP]),
+    ('hk:opt+k', []),
+    ('disabled:true', [OFF]),
+    ('disabled:false', [DISK, CPP]),
+    ('c++', [CPP]),
+    ('(beta', [CPP]),
+    ('(', [CPP]),
+    ('+', [CPP]),
+    ('a(', []),
+    ('"disk us', [DISK]),
+    ('-', []),
+    ('kw:', []),
+    ('', [DISK, CPP, OFF]),
+])
+def test_compiled_predicate(query, expected):
+    assert search(query) == expected
+
+
+@pytest.fixture
+def workflows(tmp_path, monkeypatch):
+    wf_directory = str(tmp_path / 'prefs' / 'workflows')
+    write_workflow(wf_directory, 'a', DISK_USAGE, 'See disk usage', keywords=['du'], hotkeys=[(CMD | OPT, 'D')])
+    write_workflow(wf_directory, 'b', CPP_TOOLS, 'Build c++ projects', keywords=['cpp'])
+    monkeypatch.setenv('alfred_preferences', str(tmp_path / 'prefs'))
+    monkeypatch.setenv('alfred_workflow_cache', str(tmp_path / 'cache'))
+    monkeypatch.setenv('exclude_disabled', '0')
+    return Workflows()
+
+
+@pytest.mark.parametrize('query, expected', SPECIAL_QUERIES)
+def test_search_special_queries(workflows, query, expected):
+    assert [wf['name'] for wf in workflows.search_in_workflows(query)] == expected
+    assert [wf['name'] for wf in workflows.rank_workflows(query, 10)] == expected
+
+
+def test_search(workflows):
+    assert [wf['name'] for wf in workflows.rank_workflows('c++', 10)] == ['C++ Tools (beta)']
+    assert [wf['name'] for wf in workflows.search_in_workflows('hk:cmd+opt+d')] == ['Disk Usage']
+    assert [wf['name'] for wf in workflows.rank_workflows('-kw:du', 10)] == ['C++ Tools (beta)']
@@ -0,0 +1,86 @@
+from WorkflowRanker import WorkflowRanker
+
+
+def workflow(name, keywords=(), description=None, hotkeys=()):
+    return {
+        'name': name,
+        'description': description,
+        'keywords': [{'keyword': k, 'title': None, 'text': None} for k in keywords],
+        'keyb': [{'keyb': h, 'note': None} for h in hotkeys]
+    }
+
+
+EXACT_KEYWORD = workflow('Zeta', keywords=['note'])
+KEYWORD_PREFIX = workflow('Yankee', keywords=['notes'])
+NAME_PREFIX = workflow('Quick Notebook')
+TEXT_PREFIX = workflow('Xray', description='Search your notes')
+SUBSTRING = workflow('Keynote Remote')
+FUZZY = workflow('Network Operations Tool Editor')
+NO_MATCH = workflow('Calculator', keywords=['calc'])
+
+
+def test_score_tiers():
+    ranker = WorkflowRanker('Note')
+    scores = [ranker.score(wf) for wf in [
+        EXACT_KEYWORD, KEYWORD_PREFIX, NAME_PREFIX, TEXT_PREFIX, SUBSTRING, FUZZY, NO_MATCH
+    ]]
+    assert scores[:4] == [
+        WorkflowRanker.EXACT_KEYWORD, WorkflowRanker.KEYWORD_PREFIX,
+        WorkflowRanker.NAME_PREFIX, WorkflowRanker.TEXT_PREFIX
+    ]
+    # a substring inside a word is a fuzzy match without gaps
+    assert scores[4] == WorkflowRanker.FUZZY + WorkflowRanker.FUZZY_SPAN_BONUS
+    assert WorkflowRanker.FUZZY <= scores[5] < scores[4]
+    assert scores[6] == 0
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_order_of_tiers():
+    ranker = WorkflowRanker('note')
+    workflows = [NO_MATCH, FUZZY, SUBSTRING, TEXT_PREFIX, NAME_PREFIX, KEYWORD_PREFIX, EXACT_KEYWORD]
+    assert ranker.top(ranker.match(workflows), 10) == [
+        EXACT_KEYWORD, KEYWORD_PREFIX, NAME_PREFIX, TEXT_PREFIX, SUBSTRING, FUZZY
+    ]
+
+
+def test_word_prefix_needs_word_boundary():
+    ranker = WorkflowRanker('git')
+    assert ranker.score(workflow('GitHub')) == WorkflowRanker.NAME_PREFIX
+    assert ranker.score(workflow('Open in-Git')) == WorkflowRanker.NAME_PREFIX
+    assert ranker.score(workflow('Legit')) == WorkflowRanker.FUZZY + WorkflowRanker.FUZZY_SPAN_BONUS
+
+
+def test_tighter_fuzzy_match_scores_higher():
+    ranker = WorkflowRanker('dsk')
+    tight = ranker.score(workflow('Adsk'))
+    loose = ranker.score(workflow('Add Some Kit'))
+    assert tight > loose >= WorkflowRanker.FUZZY
+    assert ranker.score(workflow('Skd')) == 0
+
+
+def test_keyword_title_and_hotkey_note_match():
+    ranker = WorkflowRanker('sett')
+    wf = workflow('Zoom')
+    wf['keywords'] = [{'keyword': 'zm', 'title': 'Open Settings', 'text': None}]
+    assert ranker.score(wf) == WorkflowRanker.TEXT_PREFIX
+    wf = workflow('Zoom')
+    wf['keyb'] = [{'keyb': '\u2318 Z', 'note': 'Zoom settings'}]
+    assert ranker.score(wf) == WorkflowRanker.TEXT_PREFIX
+
+
+def test_ties_keep_name_order():
+    ranker = WorkflowRanker('to')
+    workflows = [workflow(f'Todo {n}') for n in range(5)]
+    matches = ranker.match(workflows)
+    assert [score for score, _, _ in matches] == [WorkflowRanker.NAME_PREFIX] * 5
+    assert ranker.top(matches, 3) == workflows[:3]
+    # the position breaks ties regardless of the order of matches
+    assert ranker.top(list(reversed(matches)), 3) == workflows[:3]
+
+
+def test_top_limit():
+    ranker = WorkflowRanker('a')
+    matches = ranker.match([workflow('Beta'), workflow('Alpha'), workflow('Apple', keywords=['a'])])
+    assert [wf['name'] for wf in ranker.top(matches, 2)] == ['Apple', 'Alpha']
+    assert ranker.top(matches, 0) == []
+    assert ranker.top([], 5) == []
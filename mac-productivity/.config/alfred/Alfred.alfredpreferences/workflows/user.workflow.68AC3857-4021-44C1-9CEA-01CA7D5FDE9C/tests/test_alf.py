@@ -0,0 +1,17 @@
+import os
+
+import alf
+from tests.helpers import write_workflow
+
+
+def test_icon_is_checked_on_disk(tmp_path):
+    plist_path = write_workflow(str(tmp_path), 'a', 'A')
+    icon = os.path.join(os.path.dirname(plist_path), 'icon.png')
+    # the record still says there is no icon
+    item = {'path': plist_path, 'icon': None}
+    assert alf.get_icon_path(item) == 'icon.png'
+    with open(icon, 'wb') as fp:
+        fp.write(b'\x89PNG\r\n')
+    assert alf.get_icon_path(item) == icon
+    os.remove(icon)
+    assert alf.get_icon_path(dict(item, icon=icon)) == 'icon.png'
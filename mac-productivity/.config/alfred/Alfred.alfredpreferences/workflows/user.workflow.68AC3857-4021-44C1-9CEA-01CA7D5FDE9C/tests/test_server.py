@@ -0,0 +1,46 @@
+import pytest
+
+import server
+from ChangeDetector import PollingWatcher
+from tests.helpers import write_workflow
+
+
+@pytest.fixture
+def script_server(tmp_path, monkeypatch):
+    write_workflow(str(tmp_path / 'one' / 'workflows'), 'a', 'One')
+    write_workflow(str(tmp_path / 'two' / 'workflows'), 'a', 'Two')
+    monkeypatch.setenv('alfred_preferences', str(tmp_path / 'one'))
+    monkeypatch.setenv('alfred_workflow_cache', str(tmp_path / 'cache'))
+    monkeypatch.setenv('exclude_disabled', '0')
+    monkeypatch.setattr(server, 'get_watcher', PollingWatcher)
+    s = server.ScriptServer(str(tmp_path / 'server.sock'), 1)
+    yield s
+    s.server_close()
+
+
+def get_names(workflows):
+    return [wf['name'] for wf in workflows.get_workflows()]
+
+
+def test_workflows_follow_environment(script_server, tmp_path, monkeypatch):
+    assert get_names(script_server.get_workflows()) == ['One']
+    monkeypatch.setenv('alfred_preferences', str(tmp_path / 'two'))
+    monkeypatch.setenv('alfred_workflow_cache', str(tmp_path / 'cache2'))
+    assert get_names(script_server.get_workflows()) == ['Two']
+
+
+def test_failing_watcher_keeps_previous_workflows(script_server, tmp_path, monkeypatch):
+    workflows = script_server.get_workflows()
+    watcher = script_server.watcher
+
+    def fail(wf_directory):
+        raise ValueError('setrlimit: invalid argument')
+    monkeypatch.setattr(server, 'get_watcher', fail)
+    monkeypatch.setenv('alfred_preferences', str(tmp_path / 'two'))
+    with pytest.raises(ValueError):
+        script_server.get_workflows()
+    assert script_server.workflows is workflows
+    assert script_server.watcher is watcher
+    # the next request retries the switch
+    monkeypatch.setattr(server, 'get_watcher', PollingWatcher)
+    assert get_names(script_server.get_workflows()) == ['Two']